@@ -5,7 +5,7 @@ _blog() {
 
     _init_completion -s || return
     COMPREPLY=($(compgen -W "help new build ls\
-        rm edit defcfg clean metadata static css" -- "$cur"))
+        rm edit defcfg clean metadata static css fonts search cache compress migrate serve" -- "$cur"))
 
 } && complete -F _blog -o bashdefault -o default blog
 
@@ -0,0 +1,676 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark the blog generator"""
+
+import os
+import random
+import re
+import subprocess
+import sys
+from filecmp import cmp as same_file
+from html.parser import HTMLParser
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+from timeit import default_timer as code_timer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.error import URLError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import ujson  # type: ignore
+from css_html_js_minify import html_minify  # type: ignore
+from markdown import markdown  # type: ignore
+
+import blog
+
+BENCH_ROUNDS: int = 3
+
+# Budget for the total (top-level, cumulative) import time of `blog ls`
+LS_IMPORT_BUDGET_US: int = 80_000
+LS_FORBIDDEN_IMPORTS: Tuple[str, ...] = (
+    "markdown",
+    "pymdownx",
+    "css_html_js_minify",
+    "pyfzf",
+    "plumbum",
+    "readline",
+    "concurrent.futures",
+)
+
+
+SERVE_BENCH_PORT: int = 8765
+SERVE_BENCH_CLIENTS: int = 8
+SERVE_BENCH_SECONDS: float = 5.0
+
+BENCH_CORPUS_SIZES: Tuple[int, ...] = (100, 1_000, 10_000)
+BENCH_BASELINE_FILE: str = os.path.join(
+    os.path.dirname(__file__), "bench_baseline.json"
+)
+# Relative slowdown or memory growth past the baseline counted as a
+# regression, overridable with the `BENCH_TOLERANCE` environment variable
+BENCH_TOLERANCE: float = 0.25
+BENCH_WORDS: Tuple[str, ...] = (
+    "linux",
+    "blog",
+    "website",
+    "minimal",
+    "software",
+    "code",
+    "gentoo",
+    "kernel",
+    "python",
+    "bash",
+    "the",
+    "a",
+    "of",
+    "and",
+    "is",
+    "to",
+    "in",
+    "it",
+)
+# Subcommand runs of every corpus, `blog build` is run twice, first
+# cold (nothing built yet) and then with nothing to do
+BENCH_CORPUS_RUNS: Tuple[Tuple[str, Tuple[str, ...], int], ...] = (
+    ("ls", ("ls",), BENCH_ROUNDS),
+    ("metadata", ("metadata",), BENCH_ROUNDS),
+    ("build (cold)", ("build", "--full"), 1),
+    ("build (no-op)", ("build",), BENCH_ROUNDS),
+    ("search (cold)", ("search", "--full"), 1),
+    ("search (no-op)", ("search",), BENCH_ROUNDS),
+)
+BENCH_SEARCH_SIZE: int = 10_000
+# Environments the archive is built in by the `reproducible` check, they
+# differ in everything which could leak into the output
+REPRODUCIBLE_ENVS: Tuple[Dict[str, str], ...] = (
+    {"PYTHONHASHSEED": "1", "TZ": "UTC", "SOURCE_DATE_EPOCH": "1"},
+    {"PYTHONHASHSEED": "2", "TZ": "Pacific/Kiritimati", "SOURCE_DATE_EPOCH": "1"},
+)
+
+
+def best_of(function: Callable[[], Any], rounds: int = BENCH_ROUNDS) -> float:
+    best: float = float("inf")
+
+    for _ in range(rounds):
+        start: float = code_timer()
+        function()
+        best = min(best, code_timer() - start)
+
+    return best
+
+
+def report(name: str, total: float, count: int) -> None:
+    print(f"{name:30s}{total:10.4f} s total{total / count * 1000:10.3f} ms/blog")
+
+
+def bench_markdown(config: Dict[str, Any]) -> int:
+    """Per-blog markdown cost, fresh `markdown()` calls vs a reused engine"""
+
+    contents: List[str] = [
+        blog.decode_content(blog_meta) for blog_meta in config["blogs"].values()
+    ]
+
+    if not contents:
+        return blog.log("No blogs to benchmark")
+
+    extensions: List[str] = config["py-markdown-extensions"]
+    template_args = ("title", "time", "/c", "/", "/git")
+
+    def fresh() -> None:
+        for content in contents:
+            markdown(
+                blog.BLOG_MARKDOWN_TEMPLATE
+                % (
+                    *template_args,
+                    markdown(
+                        content, extensions=[*extensions, blog.ari_markdown_exts()()]
+                    ),
+                )
+            )
+
+    def reused() -> None:
+        for content in contents:
+            blog.BLOG_MARKDOWN_TEMPLATE % (
+                *template_args,
+                blog.render_markdown(content, extensions),
+            )
+
+    fresh_time: float = best_of(fresh)
+    reused_time: float = best_of(reused)
+
+    report("markdown() per call", fresh_time, len(contents))
+    report("reused markdown engine", reused_time, len(contents))
+    print(f"{'speedup':30s}{fresh_time / reused_time:10.2f}x")
+
+    return blog.EXIT_OK
+
+
+class HTMLTokens(HTMLParser):
+    """Tokens of an HTML page which matter to how it's rendered: tags,
+    their attributes and text with whitespace collapsed (besides in
+    `<pre>`), without omissible tags"""
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.tokens: List[Tuple[Any, ...]] = []
+        self.pre: int = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.pre += tag == "pre"
+
+        if tag not in blog.HTML_OPTIONAL_START_TAGS or attrs:
+            self.tokens.append(
+                (
+                    "start",
+                    tag,
+                    tuple(sorted((name, value or "") for name, value in attrs)),
+                )
+            )
+
+    def handle_startendtag(
+        self, tag: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        self.pre -= tag == "pre"
+
+        if not (
+            tag in blog.HTML_OPTIONAL_START_TAGS
+            or tag in blog.HTML_OPTIONAL_END_TAGS
+            or tag in blog.HTML_VOID_TAGS
+        ):
+            self.tokens.append(("end", tag))
+
+    def handle_data(self, data: str) -> None:
+        text: str = data if self.pre else re.sub(r"\s+", " ", data).strip()
+
+        if not text:
+            return
+
+        if self.tokens and self.tokens[-1][0] == "text":
+            self.tokens[-1] = ("text", f"{self.tokens[-1][1]} {text}")
+        else:
+            self.tokens.append(("text", text))
+
+
+def html_tokens(html: str) -> List[Tuple[Any, ...]]:
+    parser: HTMLTokens = HTMLTokens()
+    parser.feed(html)
+    parser.close()
+
+    return parser.tokens
+
+
+def bench_minify(config: Dict[str, Any]) -> int:
+    """HTML minifier throughput, checked against `html_minify` on every page"""
+
+    pages: Dict[str, str] = {
+        blog_id: blog.render_blog_html(config, blog_id, blog_meta)
+        for blog_id, blog_meta in config["blogs"].items()
+    }
+
+    if not pages:
+        return blog.log("No blogs to benchmark")
+
+    size: int = sum(len(page.encode()) for page in pages.values())
+    code: int = blog.EXIT_OK
+
+    for blog_id, page in pages.items():
+        if html_tokens(blog.minify_html(page)) != html_tokens(html_minify(page)):
+            code = blog.log(f"Minified {blog_id!r} differs from `html_minify`")
+
+    for name, minify in ("html_minify", html_minify), ("minify_html", blog.minify_html):
+        total: float = best_of(lambda: [minify(page) for page in pages.values()])
+        minified: int = sum(len(minify(page).encode()) for page in pages.values())
+
+        print(
+            f"{name:30s}{size / total / 1e6:10.2f} MB/s{minified / size * 100:10.1f}% \
+of {size} bytes"
+        )
+
+    return code
+
+
+def import_times(*args: str) -> Dict[str, int]:
+    """Cumulative `-X importtime` import times (in us) of top-level
+    imports of running `blog.py` with `args`"""
+
+    process: subprocess.CompletedProcess[str] = subprocess.run(
+        (
+            sys.executable,
+            "-X",
+            "importtime",
+            os.path.join(os.path.dirname(__file__), "blog.py"),
+            *args,
+        ),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "CI": "1"},
+    )
+
+    times: Dict[str, int] = {}
+
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        _, cumulative, name = line.split("|")
+
+        if cumulative.strip().isdigit():
+            times[name.rstrip()] = int(cumulative)
+
+    return times
+
+
+def bench_importtime(_: Dict[str, Any]) -> int:
+    """Import time of `ls`, fails past the budget or on heavy imports"""
+
+    best: Dict[str, int] = min(
+        (import_times("ls") for _ in range(BENCH_ROUNDS)),
+        key=lambda times: sum(
+            time for name, time in times.items() if not name.startswith("  ")
+        ),
+    )
+    total: int = sum(time for name, time in best.items() if not name.startswith("  "))
+    code: int = blog.EXIT_OK
+
+    for name, time in sorted(best.items(), key=lambda item: item[1])[-5:]:
+        print(f"{name.strip():30s}{time:10d} us")
+
+    print(f"{'total':30s}{total:10d} us (budget {LS_IMPORT_BUDGET_US} us)")
+
+    for name in map(str.strip, best):
+        if any(
+            name == forbidden or name.startswith(f"{forbidden}.")
+            for forbidden in LS_FORBIDDEN_IMPORTS
+        ):
+            code = blog.log(f"`ls` imports {name!r}")
+
+    if total > LS_IMPORT_BUDGET_US:
+        code = blog.log(f"`ls` import time {total} us is over the budget")
+
+    return code
+
+
+def bench_serve(config: Dict[str, Any]) -> int:
+    """Load test `blog serve` with concurrent clients"""
+
+    base_url: str = f"http://{blog.SERVE_HOST}:{SERVE_BENCH_PORT}"
+    urls: List[str] = [
+        f"{base_url}/",
+        f"{base_url}/content/styles.min.css",
+        *(
+            f"{base_url}/{config['blog-dir']}/{quote(blog_id)}"
+            for blog_id in config["blogs"]
+        ),
+    ]
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    server: subprocess.Popen[bytes] = subprocess.Popen(
+        (
+            sys.executable,
+            os.path.join(os.path.dirname(__file__), "blog.py"),
+            "serve",
+            f"--port={SERVE_BENCH_PORT}",
+        ),
+        env={**os.environ, "CI": "1"},
+    )
+
+    def client(offset: int, deadline: float) -> None:
+        idx: int = offset
+
+        while code_timer() < deadline:
+            start: float = code_timer()
+
+            try:
+                with urlopen(urls[idx % len(urls)]) as response:
+                    response.read()
+            except URLError as err:
+                errors.append(str(err))
+
+            latencies.append(code_timer() - start)
+            idx += 1
+
+    try:
+        for _ in range(100):
+            try:
+                urlopen(base_url).close()
+                break
+            except URLError:
+                sleep(0.1)
+        else:
+            return blog.log("`blog serve` did not start")
+
+        # First requests render everything, measure the cached steady state
+        for url in urls:
+            urlopen(url).close()
+
+        deadline: float = code_timer() + SERVE_BENCH_SECONDS
+        clients: List[Thread] = [
+            Thread(target=client, args=(offset, deadline))
+            for offset in range(SERVE_BENCH_CLIENTS)
+        ]
+
+        for thread in clients:
+            thread.start()
+
+        for thread in clients:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+
+    print(f"{'clients':30s}{SERVE_BENCH_CLIENTS:10d}")
+    print(f"{'requests/s':30s}{len(latencies) / SERVE_BENCH_SECONDS:10.1f}")
+    print(f"{'p50 latency':30s}{latencies[len(latencies) // 2] * 1000:10.3f} ms")
+    print(f"{'p99 latency':30s}{latencies[len(latencies) * 99 // 100] * 1000:10.3f} ms")
+    print(f"{'errors':30s}{len(errors):10d}")
+
+    return blog.EXIT_ERR if errors else blog.EXIT_OK
+
+
+def synthetic_blog(rng: random.Random, idx: int) -> Tuple[str, str]:
+    """Generate a blog title and markdown content exercising what real
+    blogs use: headings (some repeated), code, tables, footnotes, lists
+    and `<#id>` links, sizes vary a lot like they do in real archives"""
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choice(BENCH_WORDS) for _ in range(words)).capitalize()
+
+    parts: List[str] = []
+    headings: List[str] = []
+
+    for section in range(max(1, int(rng.paretovariate(1.5) * 2))):
+        heading: str = (
+            rng.choice(headings) if headings and rng.random() < 0.2 else sentence(3)
+        )
+        headings.append(heading)
+
+        parts.append(f"{'#' * rng.randint(1, 4)} {heading}")
+        parts.extend(
+            f"{sentence(rng.randint(10, 40))}." for _ in range(rng.randint(1, 4))
+        )
+
+        kind: int = section % 4
+
+        if kind == 0:
+            parts.append(
+                "```py\n"
+                + "\n".join(
+                    f"print({rng.randint(0, 1000)})  # {sentence(3)}"
+                    for _ in range(rng.randint(2, 12))
+                )
+                + "\n```"
+            )
+        elif kind == 1:
+            parts.append(
+                "| word | count |\n| --- | ---: |\n"
+                + "\n".join(
+                    f"| {rng.choice(BENCH_WORDS)} | {rng.randint(0, 99)} |"
+                    for _ in range(rng.randint(2, 8))
+                )
+            )
+        elif kind == 2:
+            parts.append(f"{sentence(8)}[^{section}] <#{heading.lower()}>.")
+            parts.append(f"[^{section}]: {sentence(6)}.")
+        else:
+            parts.append(
+                "\n".join(f"- {sentence(5)}" for _ in range(rng.randint(2, 6)))
+            )
+
+    return f"{sentence(4)} {idx}", "\n\n".join(parts)
+
+
+def synthetic_config(config: Dict[str, Any], count: int) -> Dict[str, Any]:
+    rng: random.Random = random.Random(count)
+    blogs: Dict[str, Any] = {}
+
+    for idx in range(count):
+        title, content = synthetic_blog(rng, idx)
+
+        blogs[blog.sanitise_title(title, blogs)] = {
+            "title": title,
+            "content": content,
+            "version": blog.BLOG_VERSION,
+            "time": 1_600_000_000.0 + idx * 3600,
+            "keywords": " ".join(rng.sample(BENCH_WORDS, 3)),
+        }
+
+    return {**config, "storage": "json", "blogs": blogs}
+
+
+def run_blog(
+    cwd: str, *args: str, env: Optional[Dict[str, str]] = None
+) -> Tuple[float, int]:
+    """Run `blog.py` in `cwd`, returning its wall time and peak RSS (in
+    KiB, including worker processes), `env` is added to the environment"""
+
+    start: float = code_timer()
+    process: subprocess.Popen[bytes] = subprocess.Popen(
+        (sys.executable, os.path.join(os.path.dirname(__file__), "blog.py"), *args),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        env={**os.environ, "CI": "1", **(env or {})},
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    wall: float = code_timer() - start
+
+    process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+
+    if process.returncode != blog.EXIT_OK:
+        raise RuntimeError(f"`blog {' '.join(args)}` exited with {process.returncode}")
+
+    return wall, usage.ru_maxrss
+
+
+def corpus_results(config: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Time and measure the peak memory of subcommands on synthetic
+    corpora of every size"""
+
+    sizes: Tuple[int, ...] = tuple(map(int, sys.argv[2:])) or BENCH_CORPUS_SIZES
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    for size in sizes:
+        results[str(size)] = {}
+
+        with TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, blog.DEFAULT_CONFIG_FILE), "w") as cfg:
+                ujson.dump(synthetic_config(config, size), cfg)
+
+            for name, args, rounds in BENCH_CORPUS_RUNS:
+                runs: List[Tuple[float, int]] = [
+                    run_blog(tmp, *args) for _ in range(rounds)
+                ]
+                results[str(size)][name] = {
+                    "wall": min(wall for wall, _ in runs),
+                    "rss": max(rss for _, rss in runs),
+                }
+
+                print(
+                    f"{size:6d} {name:23s}{results[str(size)][name]['wall']:10.4f} s\
+{results[str(size)][name]['rss']:10d} KiB"
+                )
+
+    return results
+
+
+def bench_corpus(config: Dict[str, Any]) -> int:
+    """Subcommands on synthetic corpora, fails on regressions past the
+    baseline, or on there being none if `BENCH_REQUIRE_BASELINE` is set"""
+
+    if os.getenv("BENCH_REQUIRE_BASELINE") and not os.path.isfile(BENCH_BASELINE_FILE):
+        return blog.log(
+            f"No baseline in {BENCH_BASELINE_FILE!r}, run the `baseline` benchmark"
+        )
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = corpus_results(config)
+
+    if not os.path.isfile(BENCH_BASELINE_FILE):
+        return blog.log(
+            f"No baseline in {BENCH_BASELINE_FILE!r}, run the `baseline` benchmark",
+            "WARNING",
+            blog.EXIT_OK,
+        )
+
+    with open(BENCH_BASELINE_FILE, "r") as baseline_file:
+        baseline: Dict[str, Dict[str, Dict[str, float]]] = ujson.load(baseline_file)
+
+    tolerance: float = float(os.getenv("BENCH_TOLERANCE") or BENCH_TOLERANCE)
+    code: int = blog.EXIT_OK
+
+    for size, runs in results.items():
+        for name, metrics in runs.items():
+            for metric, value in metrics.items():
+                base: Optional[float] = baseline.get(size, {}).get(name, {}).get(metric)
+
+                if base is not None and value > base * (1 + tolerance):
+                    code = blog.log(
+                        f"{size} blogs, {name}: {metric} regressed from {base} to \
+{value} (over {tolerance * 100:.0f}%)"
+                    )
+
+    return code
+
+
+def bench_baseline(config: Dict[str, Any]) -> int:
+    """Save the results of the `corpus` benchmark as its baseline"""
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = corpus_results(config)
+
+    with open(BENCH_BASELINE_FILE, "w") as baseline_file:
+        ujson.dump(results, baseline_file, indent=4)
+
+    return blog.EXIT_OK
+
+
+def bench_search(config: Dict[str, Any]) -> int:
+    """Search index build time and shard sizes on a synthetic corpus"""
+
+    size: int = int(sys.argv[2]) if len(sys.argv) > 2 else BENCH_SEARCH_SIZE
+
+    with TemporaryDirectory() as tmp:
+        corpus: Dict[str, Any] = synthetic_config(config, size)
+
+        with open(os.path.join(tmp, blog.DEFAULT_CONFIG_FILE), "w") as cfg:
+            ujson.dump(corpus, cfg)
+
+        cold, rss = run_blog(tmp, "search", "--full")
+
+        blog_meta: Dict[str, Any] = next(iter(corpus["blogs"].values()))
+        blog_meta["content"] += "\n\nSome new words for the index"
+
+        with open(os.path.join(tmp, blog.DEFAULT_CONFIG_FILE), "w") as cfg:
+            ujson.dump(corpus, cfg)
+
+        incremental, _ = run_blog(tmp, "search")
+        no_op: float = min(run_blog(tmp, "search")[0] for _ in range(BENCH_ROUNDS))
+
+        shards: List[int] = [
+            os.path.getsize(file.path)
+            for file in os.scandir(os.path.join(tmp, blog.SEARCH_DIR))
+            if file.name != "shards.json"
+        ]
+
+    print(f"{'cold':30s}{cold:10.4f} s{rss:10d} KiB")
+    print(f"{'one blog changed':30s}{incremental:10.4f} s")
+    print(f"{'no-op':30s}{no_op:10.4f} s")
+    print(
+        f"{len(shards)} shards of {size} blogs: {sum(shards)} bytes total, \
+{sum(shards) // max(len(shards), 1)} on average, {max(shards, default=0)} at most"
+    )
+
+    return blog.EXIT_OK
+
+
+def output_files(root: str) -> List[str]:
+    return sorted(
+        os.path.relpath(os.path.join(path, file), root)
+        for path, dirs, files in os.walk(root)
+        if not os.path.relpath(path, root).startswith(blog.RENDER_CACHE_DIR)
+        for file in files
+    )
+
+
+def bench_reproducible(config: Dict[str, Any]) -> int:
+    """Build the archive twice in different environments, checks the outputs are identical"""
+
+    with TemporaryDirectory() as tmp:
+        roots: List[str] = []
+
+        for idx, env in enumerate(REPRODUCIBLE_ENVS):
+            root: str = os.path.join(tmp, str(idx))
+            copytree("content", os.path.join(root, "content"))
+
+            with open(os.path.join(root, blog.DEFAULT_CONFIG_FILE), "w") as cfg:
+                ujson.dump(config, cfg, indent=4)
+
+            wall, _ = run_blog(root, "static", "--full", env=env)
+            print(f"{' '.join(map('='.join, env.items())):40s}{wall:10.4f} s")
+            roots.append(root)
+
+        files: List[str] = output_files(roots[0])
+        code: int = blog.EXIT_OK
+
+        for root in roots[1:]:
+            for file in sorted(set(files) ^ set(output_files(root))):
+                code = blog.log(f"{file!r} is only generated in some builds")
+
+            for file in files:
+                if os.path.isfile(os.path.join(root, file)) and not same_file(
+                    os.path.join(roots[0], file), os.path.join(root, file), False
+                ):
+                    code = blog.log(f"{file!r} differs between builds")
+
+        print(f"Compared {len(files)} file(s)")
+
+    return code
+
+
+SUBCOMMANDS: Dict[str, Callable[[Dict[str, Any]], int]] = {
+    "markdown": bench_markdown,
+    "importtime": bench_importtime,
+    "minify": bench_minify,
+    "serve": bench_serve,
+    "corpus": bench_corpus,
+    "baseline": bench_baseline,
+    "search": bench_search,
+    "reproducible": bench_reproducible,
+}
+
+
+def usage(code: int = blog.EXIT_ERR, _: Optional[Dict[str, Any]] = None) -> int:
+    sys.stderr.write(f"Usage: {sys.argv[0]} <benchmark> [corpus sizes...]\n")
+
+    for subcommand, func in SUBCOMMANDS.items():
+        sys.stderr.write(f"  {subcommand:20s}{func.__doc__ or ''}\n")
+
+    return code
+
+
+def main() -> int:
+    """Entry/main function"""
+
+    if len(sys.argv) < 2:
+        return usage()
+    elif sys.argv[1] not in SUBCOMMANDS:
+        return blog.log(f"{sys.argv[1]!r} is not a benchmark")
+
+    if not os.path.isfile(blog.DEFAULT_CONFIG_FILE):
+        return blog.log(f"{blog.DEFAULT_CONFIG_FILE!r} does not exist")
+
+    with open(blog.DEFAULT_CONFIG_FILE, "r") as cfg:
+        return SUBCOMMANDS[sys.argv[1]](ujson.load(cfg))
+
+
+if __name__ == "__main__":
+    assert main.__annotations__.get("return") is int, "main() should return an integer"
+
+    sys.exit(main())
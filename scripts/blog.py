@@ -4,39 +4,49 @@
 
 import hashlib
 import os
-import random
 import string
 import sys
-import xml.etree.ElementTree as etree
-from base64 import b64decode, b64encode
-from datetime import datetime
+from base64 import b64decode
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
 from glob import iglob
+from heapq import heappop, heappush
 from html import escape as html_escape
+from html import unescape as html_unescape
 from re import Match as RegexMatch
 from shutil import copy as copy_file
 from shutil import rmtree
 from tempfile import gettempdir
 from threading import Thread
 from timeit import default_timer as code_timer
-from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Container,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 from warnings import filterwarnings as filter_warnings
 
 import ujson  # type: ignore
-from css_html_js_minify import html_minify  # type: ignore
-from css_html_js_minify import process_single_css_file  # type: ignore
-from markdown import core as markdown_core  # type: ignore
-from markdown import markdown  # type: ignore
-from markdown.extensions import Extension  # type: ignore
-from markdown.inlinepatterns import InlineProcessor  # type: ignore
-from markdown.treeprocessors import Treeprocessor  # type: ignore
-from plumbum.commands.processes import ProcessExecutionError  # type: ignore
-from pyfzf import FzfPrompt  # type: ignore
 
-NOT_CI_BUILD: bool = not os.getenv("CI")
+# Anything heavier than the standard library is imported by the
+# subcommands which need it, see `ari_markdown_exts`, keeping startup
+# of commands like `ls` fast
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
-if NOT_CI_BUILD:
-    import readline
-    from atexit import register as fn_register
+    from markdown import Markdown  # type: ignore
+
+NOT_CI_BUILD: bool = not os.getenv("CI")
 
 EXIT_OK: int = 0
 EXIT_ERR: int = 1
@@ -76,11 +86,150 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "locale": "en_GB",
     "home-page-header": "My blogs",
     "comment-url": "/c",
+    "build-jobs": 0,
+    "render-cache-bytes": 64 * 1024 * 1024,
+    "journal-compact-bytes": 256 * 1024,
+    "storage": "json",
+    "posts-per-page": 50,
+    "site-url": "https://blog.ari-web.xyz/",
+    "feed-posts": 20,
+    "compress": False,
+    "inline-css": False,
     "blogs": {},
 }
 DEFAULT_CONFIG_FILE: str = "blog.json"
 HISTORY_FILE: str = ".blog_history"
-BLOG_VERSION: int = 1
+JOURNAL_FILE: str = ".blog_journal"
+POSTS_DIR: str = "posts"
+POSTS_INDEX_FILE: str = os.path.join(POSTS_DIR, "index.json")
+DEFAULT_JOURNAL_COMPACT_BYTES: int = 256 * 1024
+NETLIFY_CONFIG_FILE: str = "netlify.toml"
+SERVE_HOST: str = "127.0.0.1"
+DEFAULT_SERVE_PORT: int = 8000
+SERVE_POLL_INTERVAL: float = 0.5
+BUILD_MANIFEST_FILE: str = ".blog_manifest.json"
+RENDER_CACHE_DIR: str = ".blog_cache"
+DEFAULT_RENDER_CACHE_BYTES: int = 64 * 1024 * 1024
+DEFAULT_POSTS_PER_PAGE: int = 50
+DEFAULT_SITE_URL: str = "https://blog.ari-web.xyz/"
+DEFAULT_FEED_POSTS: int = 20
+ATOM_FEED_FILE: str = "atom.xml"
+SITEMAP_FILE: str = "sitemap.xml"
+GZIP_LEVEL: int = 9
+PROFILE_REPORT_FILE: str = ".blog_profile.json"
+PROFILE_DUMP_FILE: str = ".blog_profile.prof"
+PROFILE_TOP_BLOGS: int = 10
+HEADERS_FILE: str = "_headers"
+OUTPUT_STAGING_DIR: str = ".blog_staging"
+API_DIR: str = "api"
+API_STATE_FILE: str = os.path.join(RENDER_CACHE_DIR, "api.json")
+# Build generations `api/changes.json` lists changes of
+API_GENERATIONS: int = 32
+SEARCH_DIR: str = "search"
+SEARCH_INDEX_FILE: str = os.path.join(RENDER_CACHE_DIR, "search.json")
+# Search index shards are named after the first characters of terms
+SEARCH_PREFIX_LENGTH: int = 2
+SEARCH_MIN_TERM_LENGTH: int = 2
+SEARCH_MAX_TERM_LENGTH: int = 32
+SEARCH_STOP_WORDS: Set[str] = set(
+    """a an and are as at be but by can do for from has have i if in is it
+    its me my not of on or so that the this to was we were will with you""".split()
+)
+CHANGED_FILES_FILE: str = ".blog_changed_files.json"
+# Assets which get content fingerprinted copies, in order of dependence
+# (stylesheets get references to assets before them rewritten)
+ASSET_GLOBS: Tuple[str, ...] = (
+    "content/fonts/*.woff2",
+    "content/fonts/*.woff",
+    "content/fonts/*.min.css",
+    "content/*.min.css",
+)
+ASSET_HASH_LENGTH: int = 10
+FONTS_CSS_FILE: str = "content/fonts/Hack.css"
+GLYPH_INDEX_FILE: str = os.path.join(RENDER_CACHE_DIR, "glyphs.json")
+# Characters pages may have which aren't in blogs or templates (made
+# by markdown extensions), along with all of printable ASCII
+FONT_EXTRA_TEXT: str = (
+    f"{string.printable}\u21a9\u2018\u2019\u201c\u201d\u2013\u2014\u2026"
+)
+# Font face (weight and style) of text, which every page uses as the
+# stylesheet sets the font on every element, so it's always preloaded
+FONT_TEXT_FACE: str = "400 normal"
+# Font faces of tags worth preloading fonts for, besides the text face
+FONT_PRELOAD_TAGS: Dict[str, str] = {f"h{level}": "700 normal" for level in range(1, 7)}
+IMMUTABLE_CACHE_CONTROL: str = "public, max-age=31536000, immutable"
+PAGE_CACHE_CONTROL: str = "public, max-age=0, must-revalidate"
+BLOG_VERSION: int = 2
+
+HOME_CONFIG_KEYS: Tuple[str, ...] = (
+    "blog-dir",
+    "git-url",
+    "default-keywords",
+    "home-keywords",
+    "page-title",
+    "page-description",
+    "home-page-header",
+    "colourscheme-type",
+    "full-name",
+    "locale",
+)
+
+# Tags the HTML minifier has to know about
+HTML_BLOCK_TAGS: Set[str] = set(
+    """address article aside blockquote body dd details div dl dt figcaption
+    figure footer form h1 h2 h3 h4 h5 h6 head header hr html li link main meta
+    nav ol p pre script section style table tbody td tfoot th thead title tr
+    ul""".split()
+)
+HTML_VERBATIM_TAGS: Set[str] = {"pre", "code", "textarea", "script", "style"}
+HTML_RAW_TEXT_TAGS: Set[str] = {"textarea", "script", "style"}
+HTML_VOID_TAGS: Set[str] = set(
+    "area base br col embed hr img input link meta source track wbr".split()
+)
+HTML_OPTIONAL_START_TAGS: Set[str] = {"html", "head", "body"}
+HTML_OPTIONAL_END_TAGS: Set[str] = set(
+    "body colgroup dd dt head html li option tbody td tfoot th thead tr".split()
+)
+HTML_DEFAULT_TYPES: Dict[str, Set[str]] = {
+    "script": {"text/javascript"},
+    "style": {"text/css"},
+}
+
+BUILD_CONFIG_KEYS: Tuple[str, ...] = (
+    "blog-dir",
+    "git-url",
+    "py-markdown-extensions",
+    "default-keywords",
+    "page-title",
+    "colourscheme-type",
+    "base-homepage",
+    "full-name",
+    "locale",
+    "comment-url",
+)
+
+FLAGS: Dict[str, str] = {}
+FLAGS_HELP: Dict[str, str] = {
+    "full": "Force a complete rebuild, ignoring the build manifest",
+    "jobs": "Number of render worker processes, overrides `build-jobs`",
+    "prune": "Evict least recently used render cache entries past the budget",
+    "clear": "Remove every render cache entry",
+    "port": f"Port for `serve` to listen on, {DEFAULT_SERVE_PORT} by default",
+    "compress": "Run the `compress` stage in `static`, overrides `compress`",
+    "profile": f"Time stages and blogs, write a report ({PROFILE_REPORT_FILE!r} \
+by default)",
+    "profile-blog": f"cProfile rendering of a blog by id into {PROFILE_DUMP_FILE!r}",
+}
+
+JOURNAL: List[Dict[str, Any]] = []
+RENDER_CONFIG: Dict[str, Any] = {}
+RENDER_NEIGHBOURS: Dict[str, List[Optional[str]]] = {}
+MANIFEST: Dict[str, Any] = {}
+MARKDOWN_ENGINES: Dict[str, "Markdown"] = {}
+RENDER_CHUNKS_PER_JOB: int = 4
+RENDER_CACHE_STATS: Dict[str, int] = {"hits": 0, "misses": 0, "evicted": 0}
+PROFILE: Dict[str, Dict[str, Any]] = {"stages": {}, "blogs": {}}
+OUTPUT_CHANGES: Dict[str, Set[str]] = {"written": set(), "removed": set()}
 
 BLOG_MARKDOWN_TEMPLATE: str = """<header role="group">
     <h1 role="heading" aria-level="1">%s</h1>
@@ -140,6 +289,14 @@ content="Ari-web blog generator version {BLOG_VERSION}"/>
         type="text/css"
         hreflang="en"
     />
+
+    <link
+        rel="alternate"
+        href="/{ATOM_FEED_FILE}"
+        type="application/atom+xml"
+        title="Atom feed"
+    />
+{{resource_hints}}
 """
 
 BLOG_HTML_TEMPLATE: str = f"""<!DOCTYPE html>
@@ -189,18 +346,7 @@ HOME_PAGE_HTML_TEMPLATE: str = f"""<!DOCTYPE html>
 
                 <span aria-hidden="true" role="seperator">|</span>
 
-                <span role="menuitem">
-                    latest update: <time>{{lastest_blog_time}}</time> GMT
-                </span>
-
-                <span aria-hidden="true" role="seperator">|</span>
-
-                <span role="menuitem">
-                    latest blog: \
-                    <a href="{{latest_blog_url}}">{{latest_blog_title}}</a>
-                </span>
-
-                <span aria-hidden="true" role="seperator">|</span>
+{{info_bar}}
 
                 <a role="menuitem" href="{{git_url}}">git</a>
             </p>
@@ -222,7 +368,10 @@ HOME_PAGE_HTML_TEMPLATE: str = f"""<!DOCTYPE html>
 </html>"""
 
 
-def sanitise_title(title: str, titleset: Iterable[str], _nosep: bool = False) -> str:
+def sanitise_title(title: str, titleset: Container[str]) -> str:
+    """Turn `title` into an ID, IDs taken in `titleset` get the first
+    free `-N` suffix, so the same titles always get the same IDs"""
+
     _title: str = ""
 
     for char in title:
@@ -236,15 +385,16 @@ def sanitise_title(title: str, titleset: Iterable[str], _nosep: bool = False) ->
 
     _title = _title.lower().rstrip("-")
 
-    return (
-        _title
-        if _title not in titleset and _title.strip()
-        else sanitise_title(
-            _title + ("" if _nosep else "-") + random.choice(string.digits),
-            titleset,
-            True,
-        )
-    )
+    if _title and _title not in titleset:
+        return _title
+
+    prefix: str = f"{_title}-" if _title else ""
+    suffix: int = 2 if _title else 1
+
+    while f"{prefix}{suffix}" in titleset:
+        suffix += 1
+
+    return f"{prefix}{suffix}"
 
 
 def truncate_str(string: str, length: int) -> str:
@@ -254,105 +404,289 @@ def truncate_str(string: str, length: int) -> str:
     return string[:length] + "..."
 
 
-class BetterHeaders(Treeprocessor):
-    """Better headers
+@lru_cache(maxsize=None)
+def ari_markdown_exts() -> Any:
+    """Define the ari-web markdown extensions, markdown is imported here
+    so only subcommands which render anything have to pay for it"""
+
+    import xml.etree.ElementTree as etree
+
+    from markdown import core as markdown_core  # type: ignore
+    from markdown.extensions import Extension  # type: ignore
+    from markdown.inlinepatterns import InlineProcessor  # type: ignore
+    from markdown.treeprocessors import Treeprocessor  # type: ignore
+
+    class BetterHeaders(Treeprocessor):
+        """Better headers
+
+        - Downsizes headers from h1 -> h2
+        - Adds header links"""
+
+        def run(self, root: etree.Element) -> None:
+            ids: Set[str] = set()
+            heading_sizes_em: Dict[str, float] = {
+                "h2": 1.32,
+                "h3": 1.15,
+                "h4": 1.0,
+                "h5": 0.87,
+                "h6": 0.76,
+            }
+
+            for idx, elem in enumerate(root):
+                if elem.tag == "h1":
+                    elem.tag = "h2"
+
+                if elem.tag not in heading_sizes_em:
+                    continue
+
+                if elem.text is None:
+                    elem.text = ""
+
+                gen_id: str = sanitise_title(elem.text, ids)
+                ids.add(gen_id)
+
+                heading_parent: etree.Element = elem.makeelement(
+                    "div",
+                    {
+                        "data-pl": "",
+                        "style": f"font-size:{(heading_sizes_em[elem.tag] + 0.1):.2f}".strip(
+                            "0"
+                        ).rstrip(
+                            "."
+                        )
+                        + "em",
+                    },
+                )
 
-    - Downsizes headers from h1 -> h2
-    - Adds header links"""
+                heading: etree.Element = heading_parent.makeelement(
+                    elem.tag, {"id": gen_id}
+                )
+                link: etree.Element = heading.makeelement(
+                    "a",
+                    {
+                        "href": f"#{gen_id}",
+                        "aria-hidden": "true",
+                        "focusable": "false",
+                        "tabindex": "-1",
+                    },
+                )
 
-    def run(self, root: etree.Element) -> None:
-        ids: List[str] = []
-        heading_sizes_em: Dict[str, float] = {
-            "h2": 1.32,
-            "h3": 1.15,
-            "h4": 1.0,
-            "h5": 0.87,
-            "h6": 0.76,
-        }
+                link.text = "#"
+                heading.text = elem.text
 
-        for idx, elem in enumerate(root):
-            if elem.tag == "h1":
-                elem.tag = "h2"
+                heading_parent.extend(
+                    (
+                        link,
+                        heading,
+                    )
+                )
+                root.remove(elem)
+                root.insert(idx, heading_parent)
 
-            if elem.tag not in heading_sizes_em:
-                continue
+    class AddIDLinks(InlineProcessor):
+        """Add support for <#ID> links"""
 
-            if elem.text is None:
-                elem.text = ""
+        def handleMatch(  # pyright: ignore
+            self, match: RegexMatch, *_  # pyright: ignore
+        ) -> Tuple[etree.Element, Any, Any]:
+            link: etree.Element = etree.Element("a")
 
-            gen_id: str = sanitise_title(elem.text, ids)
-            ids.append(gen_id)
+            link.text = match.group(1) or "#"
+            link.set("href", link.text or "#")
 
-            heading_parent: etree.Element = elem.makeelement(
-                "div",
-                {
-                    "data-pl": "",
-                    "style": f"font-size:{(heading_sizes_em[elem.tag] + 0.1):.2f}".strip(
-                        "0"
-                    ).rstrip(
-                        "."
-                    )
-                    + "em",
-                },
-            )
+            return link, match.start(0), match.end(0)
+
+    class AriMarkdownExts(Extension):
+        """Ari-web markdown extensions"""
 
-            heading: etree.Element = heading_parent.makeelement(
-                elem.tag, {"id": gen_id}
+        def extendMarkdown(
+            self,
+            md: markdown_core.Markdown,
+            key: str = "add_header_links",
+            index: int = int(1e8),
+        ):
+            md.registerExtension(self)
+
+            md.treeprocessors.register(
+                BetterHeaders(md.parser), key, index  # pyright: ignore
             )
-            link: etree.Element = heading.makeelement(
-                "a",
-                {
-                    "href": f"#{gen_id}",
-                    "aria-hidden": "true",
-                    "focusable": "false",
-                    "tabindex": "-1",
-                },
+            md.inlinePatterns.register(
+                AddIDLinks(r"<(#.*)>", "a"), key, index  # pyright: ignore
             )
 
-            link.text = "#"
-            heading.text = elem.text
+    return AriMarkdownExts
 
-            heading_parent.extend(
-                (
-                    link,
-                    heading,
-                )
-            )
-            root.remove(elem)
-            root.insert(idx, heading_parent)
 
+@lru_cache(maxsize=None)
+def html_patterns() -> Tuple[Any, ...]:
+    """Regular expressions of the HTML minifier: tokens (comments,
+    declarations, tags and text), attributes, whitespace and attribute
+    values which don't need quotes"""
 
-class AddIDLinks(InlineProcessor):
-    """Add support for <#ID> links"""
+    import re
 
-    def handleMatch(  # pyright: ignore
-        self, match: RegexMatch, *_  # pyright: ignore
-    ) -> Tuple[etree.Element, Any, Any]:
-        link: etree.Element = etree.Element("a")
+    return (
+        re.compile(
+            r"<!--(.*?)-->|<(!|\?)([^>]*)>"
+            r"|<(/?)([a-zA-Z][^\s/>]*)"
+            r"((?:\s*[^\s/>=]+(?:\s*=\s*(?:\"[^\"]*\"|'[^']*'|[^\s>]+))?)*)\s*/?>"
+            r"|([^<]+|<)",
+            re.S,
+        ),
+        re.compile(r"\s*([^\s/>=]+)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+)))?"),
+        re.compile(r"\s+"),
+        re.compile(r"[^\s\"'=<>`]+"),
+    )
 
-        link.text = match.group(1) or "#"
-        link.set("href", link.text or "#")
 
-        return link, match.start(0), match.end(0)
+def minify_html_to(html: str, write: Callable[[str], Any]) -> None:
+    """Minify HTML in a single pass, passing output to `write` as it goes
 
+    - Collapses whitespace, dropping it around block elements
+    - Drops comments (besides conditional ones), optional tags and
+      needless attribute quotes
+    - Sorts attributes, so the output doesn't depend on their order
+    - Keeps content of `HTML_VERBATIM_TAGS` as is"""
 
-class AriMarkdownExts(Extension):
-    """Ari-web markdown extensions"""
+    token_re, attr_re, space_re, unquoted_re = html_patterns()
+    verbatim: List[str] = []
+    space: bool = False
+    after_block: bool = True
+    pos: int = 0
 
-    def extendMarkdown(
-        self,
-        md: markdown_core.Markdown,
-        key: str = "add_header_links",
-        index: int = int(1e8),
-    ):
-        md.registerExtension(self)
+    while pos < len(html):
+        token: RegexMatch = token_re.match(html, pos)  # type: ignore
+        pos = token.end()
+        text: Optional[str] = token.group(7)
 
-        md.treeprocessors.register(
-            BetterHeaders(md.parser), key, index  # pyright: ignore
-        )
-        md.inlinePatterns.register(
-            AddIDLinks(r"<(#.*)>", "a"), key, index  # pyright: ignore
-        )
+        if text is not None:
+            if verbatim:
+                write(text)
+                continue
+
+            text = space_re.sub(" ", text)
+
+            if text[0] == " ":
+                space = space or not after_block
+                text = text[1:]
+
+                if not text:
+                    continue
+
+            if space:
+                write(" ")
+
+            space = text[-1] == " "
+            write(text[:-1] if space else text)
+            after_block = False
+            continue
+
+        tag: Optional[str] = token.group(5)
+
+        if tag is None:
+            if token.group(2) is not None:
+                if space:
+                    write(" ")
+
+                write(token.group(0))
+                space, after_block = False, token.group(2) == "!"
+            elif token.group(1).startswith("[if"):
+                write(token.group(0))
+
+            continue
+
+        tag = tag.lower()
+        block: bool = tag in HTML_BLOCK_TAGS and not verbatim
+
+        if token.group(4):
+            if verbatim:
+                if verbatim[-1] == tag:
+                    verbatim.pop()
+
+                write(f"</{tag}>")
+                after_block = not verbatim and tag in HTML_BLOCK_TAGS
+            elif tag in HTML_VOID_TAGS or tag in HTML_OPTIONAL_END_TAGS:
+                if block:
+                    space, after_block = False, True
+            else:
+                if space and not block:
+                    write(" ")
+
+                write(f"</{tag}>")
+                space, after_block = False, block
+
+            continue
+
+        if tag in HTML_OPTIONAL_START_TAGS and not token.group(6).strip():
+            continue
+
+        attrs: List[Tuple[str, str]] = []
+
+        for attr in attr_re.finditer(token.group(6)):
+            name: str = attr.group(1).lower()
+            quote: str = '"' if attr.group(3) is None else "'"
+            value: Optional[str] = attr.group(2) or attr.group(3) or attr.group(4)
+
+            if not value:
+                attrs.append((name, f" {name}"))
+            elif name == "type" and value in HTML_DEFAULT_TYPES.get(tag, ()):
+                continue
+            elif unquoted_re.fullmatch(value):
+                attrs.append((name, f" {name}={value}"))
+            else:
+                attrs.append((name, f" {name}={quote}{value}{quote}"))
+
+        attrs.sort(key=lambda attr: attr[0])
+
+        if space and not block:
+            write(" ")
+
+        write(f"<{tag}{''.join(attr for _, attr in attrs)}>")
+        space, after_block = False, block
+
+        if tag in HTML_RAW_TEXT_TAGS:
+            close: int = html.lower().find(f"</{tag}", pos)
+            close = len(html) if close == -1 else close
+
+            write(html[pos:close])
+            verbatim.append(tag)
+            pos = close
+        elif tag in HTML_VERBATIM_TAGS and not token.group(0).endswith("/>"):
+            verbatim.append(tag)
+
+
+def minify_html(html: str) -> str:
+    parts: List[str] = []
+    minify_html_to(html, parts.append)
+    return "".join(parts)
+
+
+def decode_title(blog_meta: Dict[str, Any]) -> str:
+    if blog_meta["version"] < 2:
+        return b64decode(blog_meta["title"]).decode()
+
+    return blog_meta["title"]
+
+
+def decode_content(blog_meta: Dict[str, Any]) -> str:
+    if blog_meta["version"] < 2:
+        return b64decode(blog_meta["content"]).decode()
+
+    return blog_meta["content"]
+
+
+def upgrade_blog(blog_meta: Dict[str, Any]) -> bool:
+    """Convert a blog to the current storage format in-place, version 1
+    blogs store their title and content base64 encoded, version 2 as-is"""
+
+    if blog_meta["version"] >= BLOG_VERSION:
+        return False
+
+    blog_meta["title"] = decode_title(blog_meta)
+    blog_meta["content"] = decode_content(blog_meta)
+    blog_meta["version"] = BLOG_VERSION
+
+    return True
 
 
 def log(message: str, header: str = "ERROR", code: int = EXIT_ERR) -> int:
@@ -371,11 +705,17 @@ def editor(config: Dict[str, Any], file: str) -> None:
     os.system(config["editor-command"] % file)
 
 
+def blog_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
 def format_time(timestamp: float) -> str:
-    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    return blog_datetime(timestamp).strftime("%Y-%m-%d %H:%M:%S")
 
 
 def iinput(prompt: str, default_text: str = "") -> str:
+    import readline
+
     default_text = default_text.strip()
 
     def hook():
@@ -402,373 +742,2425 @@ def yn(prompt: str, default: str = "y", current_value: str = "") -> bool:
     ).lower()[0] == "y"
 
 
-def new_config() -> None:
-    log("Making new config...", "INFO")
+def atomic_dump(path: str, data: Any, indent: int = 4) -> None:
+    """Dump JSON into a temporary file and rename it over `path`, so
+    a crash halfway through never leaves a truncated file behind"""
 
-    with open(DEFAULT_CONFIG_FILE, "w") as cfg:
-        ujson.dump(DEFAULT_CONFIG, cfg, indent=4)
+    with open(f"{path}.tmp", "w") as tmp:
+        ujson.dump(data, tmp, indent=indent)
+        tmp.flush()
+        os.fsync(tmp.fileno())
 
+    os.replace(f"{path}.tmp", path)
 
-def pick_blog(config: Dict[str, Any]) -> str:
-    try:
-        blog_id: str = (
-            FzfPrompt()
-            .prompt(  # pyright: ignore
-                map(
-                    lambda key: f"{key} | {b64decode(config['blogs'][key]['title']).decode()!r}",  # pyright: ignore
-                    tuple(config["blogs"].keys())[::-1],
-                ),
-                "--prompt='Pick blog: '",
-            )[0]
-            .split()[0]  # pyright: ignore
-        )
-    except ProcessExecutionError:
-        log("Fzf process exited unexpectedly")
-        return ""
 
-    if blog_id not in config["blogs"]:
-        log(f"Blog {blog_id!r} does not exist")
-        return ""
+def output_unchanged(path: str, content: bytes) -> bool:
+    if not os.path.isfile(path) or os.path.getsize(path) != len(content):
+        return False
 
-    return blog_id
+    with open(path, "rb") as output:
+        return output.read() == content
 
 
-def new_blog(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """Make a new blog"""
+def output_written(path: str) -> None:
+    OUTPUT_CHANGES["removed"].discard(path)
+    OUTPUT_CHANGES["written"].add(path)
 
-    if title := iinput("blog title"):
-        readline.add_history(title)
 
-        us_title: str = title
-        s_title: str = sanitise_title(us_title, config["blogs"])
-    else:
-        raise RuntimeError("Unreachable")
+def write_output(path: str, content: bytes) -> bool:
+    """Atomically write a generated file unless it already has the same
+    content, so unchanged files keep their mtimes, returning whether
+    it was written"""
 
-    blog: Dict[str, Any] = {
-        "title": b64encode(us_title.encode()).decode(),
-        "content": "",
-        "version": BLOG_VERSION,
-        "time": 0.0,
-        "keywords": "",
-    }
+    if output_unchanged(path, content):
+        return False
 
-    file: str = tmp_path(f"{s_title}.md")
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    open(file, "w").close()
-    editor(config, file)
+    with open(f"{path}.tmp", "wb") as tmp:
+        tmp.write(content)
 
-    if not os.path.isfile(file):
-        return log(f"{file!r} does not exist"), config
+    os.replace(f"{path}.tmp", path)
+    output_written(path)
 
-    with open(file, "r") as md:
-        blog["content"] = b64encode(md.read().encode()).decode()
+    return True
 
-    os.remove(file)
 
-    if not blog["content"].strip():  # type: ignore
-        return log("Blog cannot be empty"), config
+def stage_output(path: str, content: bytes) -> bool:
+    """Write a generated file into the staging directory unless `path`
+    already has the same content, returning whether it was staged"""
 
-    user_keywords: str = iinput("keywords (seperated by spaces)")
-    readline.add_history(user_keywords)
+    if output_unchanged(path, content):
+        return False
 
-    blog["keywords"] = html_escape(user_keywords)
+    staged: str = os.path.join(OUTPUT_STAGING_DIR, path)
+    os.makedirs(os.path.dirname(staged), exist_ok=True)
 
-    blog["time"] = datetime.now().timestamp()
-    config["blogs"][s_title] = blog
+    with open(staged, "wb") as output:
+        output.write(content)
 
-    return EXIT_OK, config
+    return True
 
 
-def build_css(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """Minify (build) the CSS"""
+def swap_outputs() -> int:
+    """Move every staged file into place, each with an atomic rename,
+    so the site never has missing or half written files"""
 
-    log("Minifying CSS...", "MINIFY")
+    swapped: int = 0
 
-    saved_stdout = sys.stdout
-    sys.stdout = open(os.devnull, "w")
+    for root, _, files in os.walk(OUTPUT_STAGING_DIR):
+        for file in files:
+            path: str = os.path.relpath(os.path.join(root, file), OUTPUT_STAGING_DIR)
 
-    css_threads: List[Thread] = []
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    def _thread(t: Callable[..., Any]) -> None:
-        css_threads.append(Thread(target=t, daemon=True))
-        css_threads[-1].start()
+            os.replace(os.path.join(root, file), path)
+            output_written(path)
+            swapped += 1
 
-    if os.path.isfile("content/styles.css"):
-        log("Minifying main styles", "MINIFY")
-        _thread(
-            lambda: process_single_css_file("content/styles.css")  # pyright: ignore
-        )
+    rmtree(OUTPUT_STAGING_DIR, ignore_errors=True)
 
-    if os.path.isdir("content/fonts"):
-        log("Minifying fonts...", "MINIFY")
+    return swapped
 
-        for font in iglob("content/fonts/*.css"):
-            if font.endswith(".min.css"):
-                continue
 
-            log(f"Minifying font file: {font}", "MINIFY")
-            _thread(lambda: process_single_css_file(font))  # pyright: ignore
+def remove_output(path: str) -> None:
+    """Remove a generated file or directory, recording removed files"""
 
-    for t in css_threads:
-        t.join()
+    files: List[str] = (
+        [os.path.join(root, file) for root, _, files in os.walk(path) for file in files]
+        if os.path.isdir(path)
+        else [path]
+    )
 
-    sys.stdout.close()
-    sys.stdout = saved_stdout
+    for file in files:
+        OUTPUT_CHANGES["written"].discard(file)
+        OUTPUT_CHANGES["removed"].add(file)
 
-    log("Done minifying CSS", "MINIFY")
+    if os.path.isdir(path):
+        rmtree(path)
+    else:
+        os.remove(path)
 
-    return EXIT_OK, config
 
+def dump_output_changes() -> None:
+    """Merge files this run changed into the changed files manifest,
+    deploy tooling uploads the delta it lists and removes it"""
 
-def build(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """Build, minimise and generate site"""
+    changes: Dict[str, List[str]] = {"written": [], "removed": []}
 
-    if not config["blogs"]:
-        return log("No blogs to build"), config
+    if os.path.isfile(CHANGED_FILES_FILE):
+        try:
+            with open(CHANGED_FILES_FILE, "r") as changes_file:
+                changes = ujson.load(changes_file)
+        except ValueError:
+            log(f"{CHANGED_FILES_FILE!r} is corrupt, overwriting it", "WARNING")
+
+    atomic_dump(
+        CHANGED_FILES_FILE,
+        {
+            "written": sorted(
+                set(changes["written"]) - OUTPUT_CHANGES["removed"]
+                | OUTPUT_CHANGES["written"]
+            ),
+            "removed": sorted(
+                set(changes["removed"]) - OUTPUT_CHANGES["written"]
+                | OUTPUT_CHANGES["removed"]
+            ),
+        },
+    )
 
-    latest_blog_id: str = tuple(config["blogs"].keys())[-1]
 
-    if os.path.isdir(config["blog-dir"]):
-        rmtree(config["blog-dir"])
+def new_config() -> None:
+    log("Making new config...", "INFO")
 
-    os.makedirs(config["blog-dir"], exist_ok=True)
+    atomic_dump(DEFAULT_CONFIG_FILE, DEFAULT_CONFIG)
 
-    log("Building blogs...", "INFO")
+    if os.path.isfile(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
 
-    def thread(blog_id: str, blog_meta: Dict[str, Any]):
-        if blog_meta["version"] != BLOG_VERSION:
-            log(
-                f"{blog_id}: unmatching version between \
-{blog_meta['version']} and {BLOG_VERSION}",
-                "WARNING",
-            )
 
-        blog_dir: str = os.path.join(config["blog-dir"], blog_id)
-        os.makedirs(blog_dir, exist_ok=True)
-
-        with open(os.path.join(blog_dir, "index.html"), "w") as blog_html:
-            blog_time: str = format_time(blog_meta["time"])
-
-            blog_title: str = html_escape(b64decode(blog_meta["title"]).decode())
-
-            blog_base_html: str = markdown(
-                BLOG_MARKDOWN_TEMPLATE
-                % (
-                    blog_title,
-                    blog_time,
-                    config["comment-url"],
-                    config["base-homepage"],
-                    config["git-url"],
-                    markdown(
-                        b64decode(blog_meta["content"]).decode(),
-                        extensions=[
-                            *config["py-markdown-extensions"],
-                            AriMarkdownExts(),
-                        ],
-                    )
-                    .replace("<pre>", '<pre focusable="true" role="code" tabindex="0">')
-                    .replace(
-                        "<blockquote>", '<blockquote focusable="true" tabindex="0">'
-                    ),
-                )
-            )
+def journal_set(blog_id: str, blog_meta: Dict[str, Any]) -> None:
+    JOURNAL.append({"op": "set", "id": blog_id, "blog": blog_meta})
 
-            blog_html_full: str = BLOG_HTML_TEMPLATE.format(
-                title=config["page-title"],
-                theme_type=config["colourscheme-type"],
-                keywords=blog_meta["keywords"].replace(" ", ", ")
-                + ", "
-                + ", ".join(config["default-keywords"]),
-                blog_description=f"Blog on {blog_time} GMT -- {blog_title}",
-                blog_title=blog_title,
-                blog=blog_base_html,
-                author=config["full-name"],
-                locale=config["locale"],
-            )
 
-            log(f"Minifying {blog_id!r} HTML", "MINIFY")
-            blog_html_full = html_minify(blog_html_full)
-            log(f"Done minifying the HTML of {blog_id!r}", "MINIFY")
+def journal_remove(blog_id: str) -> None:
+    JOURNAL.append({"op": "rm", "id": blog_id})
 
-            blog_html.write(blog_html_full)
 
-        log(f"Finished building blog {blog_id!r}", "BUILD")
+def replay_journal(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the mutations in the journal on top of the loaded config"""
 
-    _tmp_threads: List[Thread] = []
+    if not os.path.isfile(JOURNAL_FILE):
+        return config
 
-    for blog_id, blog_meta in config["blogs"].items():
-        t: Thread = Thread(target=thread, args=(blog_id, blog_meta), daemon=True)
-        t.start()
+    with open(JOURNAL_FILE, "r") as journal:
+        for line in journal:
+            try:
+                entry: Dict[str, Any] = ujson.loads(line)
+            except ValueError:
+                log(f"Ignoring a truncated entry in {JOURNAL_FILE!r}", "WARNING")
+                continue
 
-        _tmp_threads.append(t)
+            if entry["op"] == "set":
+                config["blogs"][entry["id"]] = entry["blog"]
+            elif entry["op"] == "rm":
+                config["blogs"].pop(entry["id"], None)
 
-    for awaiting_thread in _tmp_threads:
-        awaiting_thread.join()
+    return config
 
-    log("Building blog index...", "INFO")
 
-    with open("index.html", "w") as index:
-        lastest_blog: Dict[str, Any] = config["blogs"][latest_blog_id]
-        lastest_blog_time: str = format_time(lastest_blog["time"])
+def flush_journal(config: Dict[str, Any]) -> None:
+    """Append pending mutations to the journal, compacting it into the
+    config once it grows past the configured size"""
 
-        blog_list = '<ol reversed="true" aria-label="latest blogs">'
+    if is_sharded(config):
+        dump_posts(config, {entry["id"] for entry in JOURNAL})
+        JOURNAL.clear()
+        return
 
-        for blog_id, blog_meta in reversed(config["blogs"].items()):
-            blog_list += f'<li><a href="{os.path.join(config["blog-dir"], blog_id)}">{html_escape(b64decode(blog_meta["title"]).decode())}</a></li>'
+    log(f"Journaling {len(JOURNAL)} change(s)", "CONFIG")
 
-        blog_list += "</ol>"
+    with open(JOURNAL_FILE, "ab+") as journal:
+        # Terminate an entry left truncated by a crashed append
+        if journal.seek(0, os.SEEK_END):
+            journal.seek(-1, os.SEEK_END)
 
-        index.write(
-            html_minify(
-                HOME_PAGE_HTML_TEMPLATE.format(
-                    title=config["page-title"],
-                    theme_type=config["colourscheme-type"],
-                    keywords=", ".join(config["home-keywords"])
-                    + ", "
-                    + ", ".join(config["default-keywords"]),
-                    home_page_description=config["page-description"],
-                    lastest_blog_time=lastest_blog_time,
-                    latest_blog_url=os.path.join(config["blog-dir"], latest_blog_id),
-                    latest_blog_title=truncate_str(
-                        b64decode(html_escape(lastest_blog["title"])).decode(), 20
-                    ),
-                    git_url=config["git-url"],
-                    content=blog_list,
-                    author=config["full-name"],
-                    locale=config["locale"],
-                    page_header=config["home-page-header"],
-                )
-            )
-        )
+            if journal.read(1) != b"\n":
+                journal.write(b"\n")
 
-    return EXIT_OK, config
+        for entry in JOURNAL:
+            journal.write(f"{ujson.dumps(entry)}\n".encode())
 
+    JOURNAL.clear()
 
-def list_blogs(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """List blogs"""
+    if os.path.getsize(JOURNAL_FILE) > config.get(
+        "journal-compact-bytes", DEFAULT_JOURNAL_COMPACT_BYTES
+    ):
+        compact_config(config)
 
-    if not config["blogs"]:
-        return log("No blogs to list"), config
 
-    for blog_id, blog_meta in config["blogs"].items():
-        print(
-            f"""ID: {blog_id}
-Title: {b64decode(blog_meta["title"]).decode()!r}
-Version: {blog_meta["version"]}
-Time_of_creation: {format_time(blog_meta["time"])}
-Keywords: {blog_meta['keywords'].replace(" ", ", ")}
-"""
+def compact_config(config: Dict[str, Any]) -> None:
+    """Sort blogs, atomically rewrite the config and drop the journal"""
+
+    if config["blogs"] and NOT_CI_BUILD:
+        log("Sorting blogs by creation time...", "CLEANUP")
+
+        sort_timer = code_timer()
+
+        config["blogs"] = dict(
+            map(
+                lambda k: (k, config["blogs"][k]),
+                sorted(config["blogs"], key=lambda k: config["blogs"][k]["time"]),
+            )
         )
 
-    return EXIT_OK, config
+        log(f"Sorted in {code_timer() - sort_timer} seconds", "TIME")
 
+    if is_sharded(config):
+        dump_posts(config, ())
+        log(f"Exporting blogs to {DEFAULT_CONFIG_FILE!r}", "CONFIG")
+    else:
+        log("Redumping config", "CONFIG")
 
-def remove_blog(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """Remove a blog page"""
+    dump_timer = code_timer()
+
+    # Loading every post body is intended, the exported config is the
+    # public API which has to contain everything
+    atomic_dump(
+        DEFAULT_CONFIG_FILE,
+        {
+            **config,
+            "blogs": {
+                blog_id: {
+                    **{key: value for key, value in blog_meta.items() if key != "hash"},
+                    "content": blog_meta["content"],
+                }
+                for blog_id, blog_meta in config["blogs"].items()
+            },
+        },
+        4 if NOT_CI_BUILD else 0,
+    )
 
-    if not config["blogs"]:
-        return log("No blogs to remove"), config
+    if os.path.isfile(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
 
-    blog_id: str = pick_blog(config)
+    log(f"Dumped config in {code_timer() - dump_timer} seconds", "TIME")
 
-    if not blog_id:
-        return EXIT_ERR, config
 
-    del config["blogs"][blog_id]
-    return EXIT_OK, config
+def needs_compaction(config: Dict[str, Any]) -> bool:
+    if not NOT_CI_BUILD:
+        # CI builds always compact to deploy the config without indentation
+        return True
 
+    if is_sharded(config):
+        return not os.path.isfile(DEFAULT_CONFIG_FILE) or os.path.getmtime(
+            DEFAULT_CONFIG_FILE
+        ) < os.path.getmtime(POSTS_INDEX_FILE)
 
-def dummy(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """Print help/usage information"""
+    return os.path.isfile(JOURNAL_FILE)
 
-    return EXIT_OK, config
 
+class LazyBlog(dict):  # type: ignore
+    """Blog metadata from the sharded storage, loads the content of
+    the blog from its post file only when it is first accessed"""
 
-def edit_title(blog: str, config: Dict[str, Any]) -> int:
-    new_title: str = iinput(
-        "edit title", b64decode(config["blogs"][blog]["title"]).decode()
-    )
+    def __init__(self, blog_id: str, blog_meta: Dict[str, Any]) -> None:
+        super().__init__(blog_meta)
+        self.blog_id: str = blog_id
 
-    if not new_title.strip():
-        return log("New title cannot be empty")
+    def __missing__(self, key: str) -> str:
+        if key != "content":
+            raise KeyError(key)
 
-    # Made it not change the slug
+        with open(post_path(self.blog_id), "r") as post:
+            self["content"] = post.read()
 
-    # old_blog: dict = config["blogs"][blog].copy()
-    # old_blog["title"] = b64encode(new_title.encode()).decode()
-    # del config["blogs"][blog]
+        return self["content"]
 
-    # config["blogs"][sanitise_title(new_title, config["blogs"])] = old_blog
-    # del old_blog
 
-    config["blogs"][blog]["title"] = b64encode(new_title.encode()).decode()
+def is_sharded(config: Dict[str, Any]) -> bool:
+    return config.get("storage", "json") == "sharded"
 
-    return EXIT_OK
 
+def post_path(blog_id: str) -> str:
+    return os.path.join(POSTS_DIR, f"{blog_id}.md")
 
-def edit_keywords(blog: str, config: Dict[str, Any]) -> int:
-    new_keywords: str = iinput("edit keywords", config["blogs"][blog]["keywords"])
 
-    if not new_keywords.strip():
-        return log("Keywords cannot be empty")
+def content_hash(blog_meta: Dict[str, Any]) -> str:
+    """Hash of the decoded content of a blog, the sharded storage index
+    has it precomputed so blogs which were never loaded are not read"""
 
-    config["blogs"][blog]["keywords"] = new_keywords
+    if "hash" in blog_meta and "content" not in blog_meta:
+        return blog_meta["hash"]
 
-    return EXIT_OK
+    return hashlib.sha256(decode_content(blog_meta).encode()).hexdigest()
 
 
-def edit_content(blog: str, config: Dict[str, Any]) -> int:
-    file: str = tmp_path(f"{blog}.md")
+def load_posts() -> Dict[str, Any]:
+    with open(POSTS_INDEX_FILE, "r") as index:
+        posts: Dict[str, Any] = ujson.load(index)
 
-    with open(file, "w") as blog_md:
-        blog_md.write(b64decode(config["blogs"][blog]["content"]).decode())
+    config: Dict[str, Any] = posts["config"]
+    config["blogs"] = {
+        blog_id: LazyBlog(blog_id, blog_meta)
+        for blog_id, blog_meta in posts["blogs"].items()
+    }
 
-    editor(config, file)
+    return config
 
-    with open(file, "r") as blog_md_new:
-        content: str = blog_md_new.read()
 
-        if not content.strip():
-            blog_md_new.close()
-            return log("Content of a blog cannot be empty")
+def dump_posts(config: Dict[str, Any], changed: Iterable[str]) -> None:
+    """Write post files of changed blogs and the sharded storage index,
+    post files are only written if their content was loaded and differs"""
 
-        config["blogs"][blog]["content"] = b64encode(content.encode()).decode()
+    os.makedirs(POSTS_DIR, exist_ok=True)
 
-    return EXIT_OK
+    for blog_id in changed:
+        if blog_id not in config["blogs"]:
+            if os.path.isfile(post_path(blog_id)):
+                log(f"Removing post file of {blog_id!r}", "REMOVE")
+                os.remove(post_path(blog_id))
 
+            continue
 
-EDIT_HOOKS: Dict[str, Callable[[str, Dict[str, Any]], int]] = {
-    "quit": lambda *_: EXIT_OK,  # pyright: ignore
-    "title": edit_title,
-    "keywords": edit_keywords,
-    "content": edit_content,
-}
+        blog_meta: Dict[str, Any] = config["blogs"][blog_id]
+        upgrade_blog(blog_meta)
 
+        if "content" not in blog_meta:
+            continue
 
-def edit(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """Edit a blog"""
+        new_hash: str = content_hash(blog_meta)
 
-    if not config["blogs"]:
-        return log("No blogs to edit"), config
+        if blog_meta.get("hash") == new_hash and os.path.isfile(post_path(blog_id)):
+            continue
 
-    blog_id: str = pick_blog(config)
+        log(f"Writing post file of {blog_id!r}", "CONFIG")
 
-    if not blog_id:
-        return EXIT_ERR, config
+        with open(f"{post_path(blog_id)}.tmp", "w") as post:
+            post.write(blog_meta["content"])
 
-    try:
-        hook: str = FzfPrompt().prompt(  # pyright: ignore
-            EDIT_HOOKS.keys(), "--prompt='What to edit: '"
-        )[0]
+        os.replace(f"{post_path(blog_id)}.tmp", post_path(blog_id))
+        blog_meta["hash"] = new_hash
 
-        if hook not in EDIT_HOOKS:
-            return log(f"Hook {hook!r} does not exist"), config
+    atomic_dump(
+        POSTS_INDEX_FILE,
+        {
+            "config": {key: value for key, value in config.items() if key != "blogs"},
+            "blogs": {
+                blog_id: {
+                    key: value for key, value in blog_meta.items() if key != "content"
+                }
+                for blog_id, blog_meta in config["blogs"].items()
+            },
+        },
+    )
 
-        EDIT_HOOKS[hook](blog_id, config)
-    except ProcessExecutionError:
-        return log("No blog selected"), config
 
-    return EXIT_OK, config
+def load_config() -> Dict[str, Any]:
+    """Load the config from whichever storage backend it uses, switching
+    backends if the `storage` key was changed"""
+
+    config: Dict[str, Any]
+
+    if os.path.isfile(POSTS_INDEX_FILE):
+        config = load_posts()
+
+        if not is_sharded(config):
+            log(f"Joining {POSTS_DIR!r} back into {DEFAULT_CONFIG_FILE!r}", "CONFIG")
+
+            for blog_meta in config["blogs"].values():
+                blog_meta["content"]
+                blog_meta.pop("hash", None)
+
+            compact_config(config)
+            rmtree(POSTS_DIR)
+
+        return config
+
+    with open(DEFAULT_CONFIG_FILE, "r") as cfg:
+        config = replay_journal(ujson.load(cfg))
+
+    if is_sharded(config):
+        log(f"Splitting {DEFAULT_CONFIG_FILE!r} into {POSTS_DIR!r}", "CONFIG")
+
+        dump_posts(config, config["blogs"])
+
+        if os.path.isfile(JOURNAL_FILE):
+            os.remove(JOURNAL_FILE)
+
+    return config
+
+
+def pick_blog(config: Dict[str, Any]) -> str:
+    from plumbum.commands.processes import ProcessExecutionError  # type: ignore
+    from pyfzf import FzfPrompt  # type: ignore
+
+    try:
+        blog_id: str = (
+            FzfPrompt()
+            .prompt(  # pyright: ignore
+                map(
+                    lambda key: f"{key} | {decode_title(config['blogs'][key])!r}",  # pyright: ignore
+                    tuple(config["blogs"].keys())[::-1],
+                ),
+                "--prompt='Pick blog: '",
+            )[0]
+            .split()[0]  # pyright: ignore
+        )
+    except ProcessExecutionError:
+        log("Fzf process exited unexpectedly")
+        return ""
+
+    if blog_id not in config["blogs"]:
+        log(f"Blog {blog_id!r} does not exist")
+        return ""
+
+    return blog_id
+
+
+def new_blog(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Make a new blog"""
+
+    import readline
+
+    if title := iinput("blog title"):
+        readline.add_history(title)
+
+        us_title: str = title
+        s_title: str = sanitise_title(us_title, config["blogs"])
+    else:
+        raise RuntimeError("Unreachable")
+
+    blog: Dict[str, Any] = {
+        "title": us_title,
+        "content": "",
+        "version": BLOG_VERSION,
+        "time": 0.0,
+        "keywords": "",
+    }
+
+    file: str = tmp_path(f"{s_title}.md")
+
+    open(file, "w").close()
+    editor(config, file)
+
+    if not os.path.isfile(file):
+        return log(f"{file!r} does not exist"), config
+
+    with open(file, "r") as md:
+        blog["content"] = md.read()
+
+    os.remove(file)
+
+    if not blog["content"].strip():  # type: ignore
+        return log("Blog cannot be empty"), config
+
+    user_keywords: str = iinput("keywords (seperated by spaces)")
+    readline.add_history(user_keywords)
+
+    blog["keywords"] = html_escape(user_keywords)
+
+    blog["time"] = datetime.now().timestamp()
+    config["blogs"][s_title] = blog
+    journal_set(s_title, blog)
+
+    return EXIT_OK, config
+
+
+def css_sources() -> List[str]:
+    return [
+        file
+        for file in ("content/styles.css", *sorted(iglob("content/fonts/*.css")))
+        if os.path.isfile(file) and not file.endswith(".min.css")
+    ]
+
+
+def css_cache_key(css: bytes) -> str:
+    from css_html_js_minify import __version__ as minifier_version  # type: ignore
+
+    return hashlib.sha256(
+        b"css\0" + minifier_version.encode() + b"\0" + css
+    ).hexdigest()
+
+
+def minify_css(css: bytes) -> Tuple[bytes, float]:
+    """Minify a stylesheet, returning it and how long it took"""
+
+    from css_html_js_minify import css_minify  # type: ignore
+
+    start: float = code_timer()
+    minified: bytes = css_minify(css.decode()).encode()
+
+    return minified, code_timer() - start
+
+
+def build_css(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Minify (build) the CSS"""
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    log("Minifying CSS...", "MINIFY")
+
+    manifest: Dict[str, Any] = load_manifest("css")
+    built: Dict[str, str] = manifest.setdefault("css", {})
+    sources: Dict[str, bytes] = {}
+    keys: Dict[str, str] = {}
+    to_minify: List[str] = []
+
+    def write_css(file: str, minified: bytes, took: float, how: str) -> None:
+        write_output(f"{file[:-4]}.min.css", minified)
+        built[file] = keys[file]
+        log(
+            f"{file!r}: {len(sources[file])} -> {len(minified)} bytes \
+(-{(1 - len(minified) / max(len(sources[file]), 1)) * 100:.1f}%), {how} in \
+{took:.4f} seconds",
+            "MINIFY",
+        )
+
+    for file in css_sources():
+        with open(file, "rb") as css:
+            sources[file] = css.read()
+
+        keys[file] = css_cache_key(sources[file])
+
+        if built.get(file) == keys[file] and os.path.isfile(f"{file[:-4]}.min.css"):
+            log(f"{file!r} is unchanged", "MINIFY")
+            continue
+
+        start: float = code_timer()
+        cached: Optional[bytes] = (
+            None if "full" in FLAGS else render_cache_get(keys[file])
+        )
+
+        if cached is None:
+            to_minify.append(file)
+        else:
+            write_css(file, cached, code_timer() - start, "cached")
+
+    if to_minify:
+        with ProcessPoolExecutor(
+            max_workers=min(build_jobs(config), len(to_minify))
+        ) as pool:
+            for file, (minified, took) in zip(
+                to_minify, pool.map(minify_css, (sources[file] for file in to_minify))
+            ):
+                render_cache_put(keys[file], minified)
+                write_css(file, minified, took, "minified")
+
+    dump_manifest(manifest)
+
+    log(
+        f"Done minifying CSS, minified {len(to_minify)} file(s), \
+{len(sources) - len(to_minify)} cached or unchanged",
+        "MINIFY",
+    )
+
+    return EXIT_OK, config
+
+
+def is_fingerprinted(file: str) -> bool:
+    parts: List[str] = os.path.basename(file).split(".")
+
+    return (
+        len(parts) > 2
+        and len(parts[1]) == ASSET_HASH_LENGTH
+        and all(char in string.hexdigits for char in parts[1])
+    )
+
+
+def fingerprinted_assets() -> Dict[str, Tuple[str, bytes]]:
+    """Fingerprinted URLs and content of static assets by their plain
+    URLs, references to assets in stylesheets are rewritten before
+    hashing, so changing a font changes the stylesheets using it too"""
+
+    assets: Dict[str, Tuple[str, bytes]] = {}
+
+    for glob_ex in ASSET_GLOBS:
+        for file in sorted(iglob(glob_ex)):
+            if is_fingerprinted(file):
+                continue
+
+            with open(file, "rb") as asset:
+                content: bytes = asset.read()
+
+            if file.endswith(".css"):
+                for url, (fingerprinted_url, _) in assets.items():
+                    content = content.replace(url.encode(), fingerprinted_url.encode())
+
+            name, ext = os.path.basename(file).split(".", 1)
+            asset_hash: str = hashlib.sha256(content).hexdigest()[:ASSET_HASH_LENGTH]
+
+            assets[f"/{file}"] = (
+                f"/{os.path.dirname(file)}/{name}.{asset_hash}.{ext}",
+                content,
+            )
+
+    return assets
+
+
+def asset_urls() -> Dict[str, str]:
+    """Fingerprinted URLs of assets by their plain URLs, only of those
+    which have their fingerprinted copies generated"""
+
+    return {
+        url: fingerprinted_url
+        for url, (fingerprinted_url, _) in fingerprinted_assets().items()
+        if os.path.isfile(fingerprinted_url[1:])
+    }
+
+
+def link_assets(html: bytes, assets: Dict[str, str]) -> bytes:
+    """Point links in a page to fingerprinted assets"""
+
+    import re
+
+    for url, fingerprinted_url in assets.items():
+        html = re.sub(
+            rb"(href=[\"']?)" + re.escape(url.encode()) + rb"(?=[\"'\s>])",
+            rb"\g<1>" + fingerprinted_url.encode(),
+            html,
+        )
+
+    return html
+
+
+def critical_css_stylesheet() -> Optional[str]:
+    """The minified stylesheet to inline critical CSS from, with
+    references to assets fingerprinted if they are"""
+
+    url: str = "/content/styles.min.css"
+    assets: Dict[str, Tuple[str, bytes]] = fingerprinted_assets()
+
+    if url not in assets:
+        return None
+
+    if os.path.isfile(assets[url][0][1:]):
+        return assets[url][1].decode()
+
+    with open(url[1:], "r") as stylesheet:
+        return stylesheet.read()
+
+
+def split_css(css: str, pos: int = 0) -> Tuple[List[Tuple[Any, ...]], int]:
+    """Split minified CSS into `("raw", css)` items which are always
+    kept (at-rules like `@import` and `@font-face`), `("rule",
+    selectors, declarations)` and `("block", prelude, items)` items
+    (`@media` and `@supports`), up to the end of the current block"""
+
+    items: List[Tuple[Any, ...]] = []
+
+    def scan(pos: int, stops: str) -> int:
+        quote: str = ""
+
+        while pos < len(css):
+            if quote:
+                quote = "" if css[pos] == quote else quote
+            elif css[pos] in "\"'":
+                quote = css[pos]
+            elif css[pos] in stops:
+                return pos
+
+            pos += 1
+
+        return pos
+
+    while pos < len(css):
+        end: int = scan(pos, "{;}")
+        prelude: str = css[pos:end].strip()
+
+        if end >= len(css) or css[end] == "}":
+            return items, end + 1
+        elif css[end] == ";":
+            items.append(("raw", css[pos : end + 1]))
+            pos = end + 1
+        elif prelude.startswith("@media") or prelude.startswith("@supports"):
+            children, pos = split_css(css, end + 1)
+            items.append(("block", prelude, children))
+        elif prelude.startswith("@"):
+            depth: int = 0
+            block_end: int = end
+
+            while block_end < len(css):
+                block_end = scan(block_end, "{}")
+                depth += 1 if css[block_end : block_end + 1] == "{" else -1
+                block_end += 1
+
+                if depth == 0:
+                    break
+
+            items.append(("raw", css[pos:block_end]))
+            pos = block_end
+        else:
+            body_end: int = scan(end, "}")
+            selectors: List[str] = []
+            depth = 0
+            start: int = 0
+
+            for idx, char in enumerate(prelude):
+                depth += (char == "(") - (char == ")")
+
+                if char == "," and depth == 0:
+                    selectors.append(prelude[start:idx])
+                    start = idx + 1
+
+            selectors.append(prelude[start:])
+            items.append(("rule", tuple(selectors), css[end + 1 : body_end]))
+            pos = body_end + 1
+
+    return items, pos
+
+
+@lru_cache(maxsize=None)
+def selector_features(selector: str) -> FrozenSet[str]:
+    """Tags, ids, classes and attributes an element matching `selector`
+    needs to have on the page (pseudo-classes, pseudo-elements and
+    combinators are ignored, so this is an over-approximation)"""
+
+    import re
+
+    features: Set[str] = set()
+    selector = re.sub(r"::?[\w-]+(\([^)]*\))?", "", selector)
+
+    for compound in re.split(r"[\s>+~]+", selector):
+        for tag, feature in re.findall(
+            r"^([a-zA-Z][\w-]*)|([#.][\w-]+|\[[\w-]+)", compound
+        ):
+            features.add(f"<{tag.lower()}" if tag else feature)
+
+    return frozenset(features)
+
+
+@lru_cache(maxsize=None)
+def stylesheet_rules(stylesheet: str) -> Tuple[List[Tuple[Any, ...]], FrozenSet[str]]:
+    """Parsed stylesheet and every feature its selectors look for"""
+
+    def walk(items: List[Tuple[Any, ...]]) -> Iterator[FrozenSet[str]]:
+        for item in items:
+            if item[0] == "rule":
+                yield from map(selector_features, item[1])
+            elif item[0] == "block":
+                yield from walk(item[2])
+
+    items: List[Tuple[Any, ...]] = split_css(stylesheet)[0]
+    return items, frozenset().union(*walk(items))
+
+
+@lru_cache(maxsize=None)
+def critical_css(stylesheet: str, features: FrozenSet[str]) -> str:
+    """Rules of the stylesheet which can match a page with `features`,
+    pages with the same features share the result"""
+
+    def prune(items: List[Tuple[Any, ...]]) -> str:
+        css: List[str] = []
+
+        for item in items:
+            if item[0] == "raw":
+                css.append(item[1])
+            elif item[0] == "block":
+                children: str = prune(item[2])
+
+                if children:
+                    css.append(f"{item[1]}{{{children}}}")
+            else:
+                selectors: List[str] = [
+                    selector
+                    for selector in item[1]
+                    if selector_features(selector) <= features
+                ]
+
+                if selectors:
+                    css.append(f"{','.join(selectors)}{{{item[2]}}}")
+
+        return "".join(css)
+
+    return prune(stylesheet_rules(stylesheet)[0])
+
+
+def inline_critical_css(html: bytes, stylesheet: str) -> bytes:
+    """Inline the CSS a page needs in a `<style>`, moving the stylesheet
+    link to the end of the page so it doesn't block rendering"""
+
+    import re
+
+    link: Optional[RegexMatch] = re.search(  # type: ignore
+        rb"<link [^>]*\brel=stylesheet[^>]*>", html
+    )
+
+    if link is None:
+        return html
+
+    features: Set[str] = {"<html", "<head", "<body"}
+
+    for tag, attrs in re.findall(rb"<([a-zA-Z][\w-]*)([^>]*)>", html):
+        features.add(f"<{tag.decode().lower()}")
+
+        for name, *values in re.findall(
+            rb"([\w-]+)(?:=(?:\"([^\"]*)\"|'([^']*)'|([^\s>]*)))?", attrs
+        ):
+            features.add(f"[{name.decode().lower()}")
+
+            if name in {b"id", b"class"}:
+                prefix: str = "#" if name == b"id" else "."
+                features.update(
+                    f"{prefix}{word}" for word in b"".join(values).decode().split()
+                )
+
+    css: str = critical_css(
+        stylesheet, frozenset(features) & stylesheet_rules(stylesheet)[1]
+    )
+
+    return (
+        html[: link.start()]
+        + f"<style>{css}</style>".encode()
+        + html[link.end() :]
+        + link.group(0)
+    )
+
+
+def finish_page(
+    html: bytes, assets: Dict[str, str], stylesheet: Optional[str]
+) -> bytes:
+    """Post-process a rendered page before writing it"""
+
+    html = link_assets(html, assets)
+    return html if stylesheet is None else inline_critical_css(html, stylesheet)
+
+
+def fingerprint_assets(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Write content fingerprinted copies of assets, removing old ones"""
+
+    assets: Dict[str, Tuple[str, bytes]] = fingerprinted_assets()
+    current: Set[str] = {url[1:] for url, _ in assets.values()}
+
+    for glob_ex in ASSET_GLOBS:
+        for file in iglob(glob_ex):
+            if is_fingerprinted(file) and file not in current:
+                log(f"Removing old asset {file!r}", "REMOVE")
+                remove_output(file)
+
+    for fingerprinted_url, content in assets.values():
+        if os.path.isfile(fingerprinted_url[1:]):
+            continue
+
+        write_output(fingerprinted_url[1:], content)
+        log(f"Generated {fingerprinted_url[1:]!r}", "GENERATE")
+
+    return EXIT_OK, config
+
+
+def generate_headers(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Generate the netlify `_headers` file, fingerprinted assets are
+    cached forever, pages get revalidated using build hash ETags"""
+
+    from urllib.parse import quote
+
+    manifest: Dict[str, Any] = load_manifest()
+
+    rules: List[str] = ["# Generated by scripts/blog.py, do not edit"]
+
+    for fingerprinted_url in asset_urls().values():
+        rules.append(f"{fingerprinted_url}\n  Cache-Control: {IMMUTABLE_CACHE_CONTROL}")
+
+    pages: Dict[str, str] = {
+        **manifest.get("pages", {}),
+        **{
+            f"/{config['blog-dir']}/{blog_id}": page_hash
+            for blog_id, page_hash in manifest["blogs"].items()
+        },
+    }
+
+    for path, page_hash in pages.items():
+        rules.append(
+            f"{quote(path)}\n  Cache-Control: {PAGE_CACHE_CONTROL}\n"
+            f'  ETag: "{page_hash[:32]}"'
+        )
+
+    log(f"Generating {HEADERS_FILE!r}...", "GENERATE")
+
+    write_output(HEADERS_FILE, ("\n\n".join(rules) + "\n").encode())
+
+    return EXIT_OK, config
+
+
+def unicode_range(codepoints: Iterable[int]) -> str:
+    """CSS `unicode-range` of code points, consecutive ones are merged"""
+
+    ranges: List[List[int]] = []
+
+    for codepoint in sorted(codepoints):
+        if ranges and ranges[-1][1] + 1 == codepoint:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+
+    return ",".join(
+        f"U+{start:X}" if start == end else f"U+{start:X}-{end:X}"
+        for start, end in ranges
+    )
+
+
+def used_codepoints(config: Dict[str, Any]) -> Set[int]:
+    """Code points used by blogs and templates, code points of every
+    blog are kept in an index by a hash of its title, content and
+    keywords so only new or changed blogs have to be decoded and
+    scanned"""
+
+    index: Dict[str, Any] = {"blogs": {}}
+
+    if os.path.isfile(GLYPH_INDEX_FILE):
+        try:
+            with open(GLYPH_INDEX_FILE, "r") as index_file:
+                index = ujson.load(index_file)
+        except ValueError:
+            log(f"{GLYPH_INDEX_FILE!r} is corrupt, rescanning every blog", "WARNING")
+
+    blogs: Dict[str, List[str]] = {}
+    scanned: int = 0
+
+    for blog_id, blog_meta in config["blogs"].items():
+        blog_hash: str = hashlib.sha256(
+            ujson.dumps(
+                (
+                    decode_title(blog_meta),
+                    content_hash(blog_meta),
+                    blog_meta["keywords"],
+                )
+            ).encode()
+        ).hexdigest()
+        indexed: Optional[List[str]] = index["blogs"].get(blog_id)
+
+        if indexed is not None and indexed[0] == blog_hash:
+            blogs[blog_id] = indexed
+            continue
+
+        blogs[blog_id] = [
+            blog_hash,
+            "".join(
+                sorted(
+                    set(
+                        blog_id
+                        + decode_title(blog_meta)
+                        + decode_content(blog_meta)
+                        + html_unescape(blog_meta["keywords"])
+                    )
+                )
+            ),
+        ]
+        scanned += 1
+
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+    atomic_dump(GLYPH_INDEX_FILE, {"blogs": blogs}, 0)
+
+    log(
+        f"Scanned {scanned} blog(s) for glyphs, {len(blogs) - scanned} indexed",
+        "FONTS",
+    )
+
+    text: List[str] = [
+        FONT_EXTRA_TEXT,
+        BLOG_MARKDOWN_TEMPLATE,
+        BLOG_HTML_TEMPLATE,
+        HOME_PAGE_HTML_TEMPLATE,
+        ujson.dumps({key: config[key] for key in HOME_CONFIG_KEYS}, ensure_ascii=False),
+        *(chars for _, chars in blogs.values()),
+    ]
+
+    return set(map(ord, "".join(text)))
+
+
+def subset_font(font: str, output: str, codepoints: List[int]) -> Tuple[str, int, int]:
+    """Subset a font to `codepoints` using `fontTools`, returning the
+    font and the sizes of it and its subset"""
+
+    import logging
+
+    from fontTools import subset  # type: ignore
+
+    # Tables fontTools can't subset get dropped, which is fine
+    logging.getLogger("fontTools").setLevel(logging.ERROR)
+
+    options: Any = subset.Options()
+    options.flavor = os.path.splitext(font)[1][1:]
+    options.layout_features = ["*"]
+
+    subsetted: Any = subset.load_font(font, options)
+    # Keep the timestamp of the font, so subsets are reproducible
+    subsetted.recalcTimestamp = False
+    subsetter: Any = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(subsetted)
+    subset.save_font(subsetted, output, options)
+    subsetted.close()
+
+    return font, os.path.getsize(font), os.path.getsize(output)
+
+
+def subset_fonts(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Subset fonts to the glyphs blogs use"""
+
+    import re
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from importlib.util import find_spec
+
+    if find_spec("fontTools") is None:
+        log("`fontTools` is not installed, not subsetting fonts", "WARNING")
+        return EXIT_OK, config
+
+    if not os.path.isfile(FONTS_CSS_FILE):
+        return log(f"{FONTS_CSS_FILE!r} does not exist"), config
+
+    with open(FONTS_CSS_FILE, "rb") as fonts_css:
+        source: bytes = fonts_css.read()
+
+    # Always start off the plain minified stylesheet, so the subset
+    # faces don't pile up over runs
+    css: Optional[bytes] = render_cache_get(css_cache_key(source))
+
+    if css is None:
+        css = minify_css(source)[0]
+        render_cache_put(css_cache_key(source), css)
+
+    codepoints: List[int] = sorted(used_codepoints(config))
+    faces: List[str] = re.findall(r"@font-face\{[^}]*\}", css.decode())
+    face_fonts: List[List[str]] = [
+        [url[1:] for url in re.findall(r"url\(([^)]+)\)", face)] for face in faces
+    ]
+    fonts: Dict[str, str] = {
+        font: f"{os.path.splitext(font)[0]}.subset{os.path.splitext(font)[1]}"
+        for face_font in face_fonts
+        for font in face_font
+    }
+
+    manifest: Dict[str, Any] = load_manifest("fonts")
+    subset_hash: str = hashlib.sha256(ujson.dumps(codepoints).encode()).hexdigest()
+    pending: List[str] = []
+    # Fonts which couldn't be subset, their faces keep the full fonts
+    failed: Set[str] = set()
+
+    if find_spec("brotli") is None and any(font.endswith(".woff2") for font in fonts):
+        log(
+            "`brotli` is not installed, not subsetting faces with woff2 fonts",
+            "WARNING",
+        )
+
+        for face_font in face_fonts:
+            if any(font.endswith(".woff2") for font in face_font):
+                failed.update(face_font)
+
+    for font, output in fonts.items():
+        if font in failed:
+            continue
+
+        with open(font, "rb") as font_file:
+            font_hash: str = hashlib.sha256(font_file.read()).hexdigest()
+
+        if manifest.setdefault("fonts", {}).get(font) != [
+            font_hash,
+            subset_hash,
+        ] or not os.path.isfile(output):
+            manifest["fonts"][font] = [font_hash, subset_hash]
+            pending.append(font)
+
+    if pending:
+        log(
+            f"Subsetting {len(pending)} font(s) to {len(codepoints)} code points",
+            "FONTS",
+        )
+
+        rmtree(OUTPUT_STAGING_DIR, ignore_errors=True)
+        os.makedirs(
+            os.path.join(OUTPUT_STAGING_DIR, os.path.dirname(FONTS_CSS_FILE)),
+            exist_ok=True,
+        )
+
+        with ProcessPoolExecutor(
+            max_workers=min(build_jobs(config), len(pending))
+        ) as pool:
+            futures: Dict[Any, str] = {
+                pool.submit(
+                    subset_font,
+                    font,
+                    os.path.join(OUTPUT_STAGING_DIR, fonts[font]),
+                    codepoints,
+                ): font
+                for font in pending
+            }
+
+            for future in as_completed(futures):
+                try:
+                    font, size, subset_size = future.result()
+                except Exception as err:
+                    font = futures[future]
+                    log(
+                        f"Failed to subset {font!r}, using the full font: {err}",
+                        "WARNING",
+                    )
+
+                    failed.add(font)
+                    del manifest["fonts"][font]
+
+                    if os.path.isfile(os.path.join(OUTPUT_STAGING_DIR, fonts[font])):
+                        os.remove(os.path.join(OUTPUT_STAGING_DIR, fonts[font]))
+
+                    continue
+
+                log(f"{font!r}: {size} -> {subset_size} bytes", "FONTS")
+
+        swap_outputs()
+
+    dump_manifest(manifest)
+
+    # Faces declared later take precedence for the code points in their
+    # range, glyphs out of it still come from the full fonts
+    subset_faces: List[str] = [
+        re.sub(
+            r"url\(([^)]+)\)",
+            lambda url: f"url(/{fonts[url.group(1)[1:]]})",
+            face[:-1],
+        )
+        + f";unicode-range:{unicode_range(codepoints)}}}"
+        for face, face_font in zip(faces, face_fonts)
+        if failed.isdisjoint(face_font)
+    ]
+
+    write_output(f"{FONTS_CSS_FILE[:-4]}.min.css", css + "".join(subset_faces).encode())
+
+    log(f"Wrote {len(subset_faces)} subset font face(s)", "FONTS")
+
+    return EXIT_OK, config
+
+
+@lru_cache(maxsize=None)
+def font_faces() -> Dict[str, str]:
+    """URLs of the woff2 fonts browsers load for every face (weight and
+    style) of the font stylesheet, subset faces win over full ones"""
+
+    import re
+
+    file: str = f"{FONTS_CSS_FILE[:-4]}.min.css"
+
+    if not os.path.isfile(file):
+        file = FONTS_CSS_FILE
+
+    if not os.path.isfile(file):
+        return {}
+
+    with open(file, "r") as fonts_css:
+        css: str = fonts_css.read()
+
+    faces: Dict[str, str] = {}
+
+    for face in re.findall(r"@font-face\s*\{([^}]*)\}", css):
+        woff2: Optional[RegexMatch] = re.search(  # type: ignore
+            r"url\(\s*[\"']?([^)\"']+\.woff2)", face
+        )
+        weight: Optional[RegexMatch] = re.search(  # type: ignore
+            r"font-weight\s*:\s*(\w+)", face
+        )
+        style: Optional[RegexMatch] = re.search(  # type: ignore
+            r"font-style\s*:\s*(\w+)", face
+        )
+
+        if woff2 is not None:
+            faces[
+                f"{'400' if weight is None else weight.group(1)} \
+{'normal' if style is None else style.group(1)}"
+            ] = woff2.group(1)
+
+    return faces
+
+
+def resource_hints(html: str, prefetch: Iterable[Optional[str]] = ()) -> str:
+    """`<link>`s preloading fonts of the faces `html` uses (the text
+    face always) and prefetching the `prefetch` pages"""
+
+    import re
+
+    faces: Dict[str, str] = font_faces()
+    fonts: Set[str] = {
+        faces[face]
+        for face in {
+            FONT_TEXT_FACE,
+            *(
+                FONT_PRELOAD_TAGS[tag.lower()]
+                for tag in re.findall(
+                    rf"<({'|'.join(FONT_PRELOAD_TAGS)})[\s>]", html, re.IGNORECASE
+                )
+            ),
+        }
+        if face in faces
+    }
+
+    return "".join(
+        (
+            *(
+                f'<link rel="preload" href="{font}" as="font" type="font/woff2" \
+crossorigin="anonymous"/>'
+                for font in sorted(fonts)
+            ),
+            *(
+                f'<link rel="prefetch" href="{page}"/>'
+                for page in prefetch
+                if page is not None
+            ),
+        )
+    )
+
+
+def load_manifest(*sections: str) -> Dict[str, Any]:
+    """The build manifest, read once per run and shared by every stage,
+    under `--full` only the `sections` the calling stage owns are reset
+    so stages don't drop each other's state"""
+
+    if not MANIFEST:
+        if os.path.isfile(BUILD_MANIFEST_FILE):
+            try:
+                with open(BUILD_MANIFEST_FILE, "r") as manifest:
+                    MANIFEST.update(ujson.load(manifest))
+            except ValueError:
+                log(
+                    f"{BUILD_MANIFEST_FILE!r} is corrupt, rebuilding everything",
+                    "WARNING",
+                )
+
+    if "full" in FLAGS:
+        for section in sections:
+            MANIFEST.pop(section, None)
+
+    MANIFEST.setdefault("blogs", {})
+    return MANIFEST
+
+
+def dump_manifest(manifest: Dict[str, Any]) -> None:
+    atomic_dump(BUILD_MANIFEST_FILE, manifest, 0)
+
+
+def build_fingerprint(config: Dict[str, Any], *inputs: Any) -> str:
+    """Hash of everything besides the blog itself that ends up in its
+    page, `inputs` are anything else pages depend on"""
+
+    return hashlib.sha256(
+        ujson.dumps(
+            (
+                BLOG_VERSION,
+                BLOG_MARKDOWN_TEMPLATE,
+                BLOG_HTML_TEMPLATE,
+                *(config[key] for key in BUILD_CONFIG_KEYS),
+                *inputs,
+            )
+        ).encode()
+    ).hexdigest()
+
+
+def blog_neighbours(config: Dict[str, Any]) -> Dict[str, List[Optional[str]]]:
+    """URLs of the previous and next blogs in time of every blog"""
+
+    blog_ids: List[str] = sorted(
+        config["blogs"], key=lambda blog_id: config["blogs"][blog_id]["time"]
+    )
+    urls: List[Optional[str]] = [
+        None,
+        *(f"/{config['blog-dir']}/{blog_id}" for blog_id in blog_ids),
+        None,
+    ]
+
+    return {blog_id: [urls[idx], urls[idx + 2]] for idx, blog_id in enumerate(blog_ids)}
+
+
+def blog_build_hash(
+    fingerprint: str,
+    blog_id: str,
+    blog_meta: Dict[str, Any],
+    neighbours: List[Optional[str]],
+) -> str:
+    return hashlib.sha256(
+        ujson.dumps(
+            (
+                fingerprint,
+                blog_id,
+                neighbours,
+                decode_title(blog_meta),
+                content_hash(blog_meta),
+                blog_meta["keywords"],
+                blog_meta["time"],
+                blog_meta["version"],
+            )
+        ).encode()
+    ).hexdigest()
+
+
+def prune_blogs(config: Dict[str, Any], manifest: Dict[str, Any]) -> int:
+    pruned: int = 0
+
+    for blog_id in os.listdir(config["blog-dir"]):
+        if blog_id in config["blogs"]:
+            continue
+
+        log(f"Pruning removed blog {blog_id!r}", "REMOVE")
+
+        remove_output(os.path.join(config["blog-dir"], blog_id))
+        manifest["blogs"].pop(blog_id, None)
+        pruned += 1
+
+    return pruned
+
+
+def cpu_time() -> float:
+    """CPU time of this process and its waited for children (workers)"""
+
+    from time import process_time
+
+    times: os.times_result = os.times()
+    return process_time() + times.children_user + times.children_system
+
+
+@contextmanager
+def timed(timings: Optional[Dict[str, Dict[str, float]]], name: str) -> Iterator[None]:
+    """Add the wall and CPU time of the block to `timings[name]`,
+    does nothing if `timings` is None"""
+
+    if timings is None:
+        yield
+        return
+
+    wall: float = code_timer()
+    cpu: float = cpu_time()
+
+    try:
+        yield
+    finally:
+        timing: Dict[str, float] = timings.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+        timing["wall"] += code_timer() - wall
+        timing["cpu"] += cpu_time() - cpu
+
+
+def profile_stages() -> Optional[Dict[str, Dict[str, float]]]:
+    return PROFILE["stages"] if "profile" in FLAGS else None
+
+
+def markdown_engine(extensions: List[str]) -> "Markdown":
+    """Get a configured markdown engine, one is built per process
+    for every unique set of extensions and reused afterwards"""
+
+    from markdown import Markdown  # type: ignore
+
+    fingerprint: str = "\0".join(extensions)
+
+    if fingerprint not in MARKDOWN_ENGINES:
+        MARKDOWN_ENGINES[fingerprint] = Markdown(
+            extensions=[*extensions, ari_markdown_exts()()]
+        )
+
+    return MARKDOWN_ENGINES[fingerprint]
+
+
+def render_markdown(content: str, extensions: List[str]) -> str:
+    return markdown_engine(extensions).reset().convert(content)  # type: ignore
+
+
+def render_blog_html(
+    config: Dict[str, Any],
+    blog_id: str,
+    blog_meta: Dict[str, Any],
+    phases: Optional[Dict[str, Dict[str, float]]] = None,
+    neighbours: Iterable[Optional[str]] = (),
+) -> str:
+    """Render a single blog page without minifying it, timing every
+    phase into `phases` if it's passed, `neighbours` are pages to
+    prefetch"""
+
+    # Older versions are still supported, newer ones may not render right
+    if blog_meta["version"] > BLOG_VERSION:
+        log(
+            f"{blog_id}: version {blog_meta['version']} is newer than \
+{BLOG_VERSION}",
+            "WARNING",
+        )
+
+    with timed(phases, "decode"):
+        blog_time: str = format_time(blog_meta["time"])
+        blog_title: str = html_escape(decode_title(blog_meta))
+        blog_content: str = decode_content(blog_meta)
+
+    with timed(phases, "markdown"):
+        blog_markdown: str = render_markdown(
+            blog_content, config["py-markdown-extensions"]
+        )
+
+    with timed(phases, "template"):
+        blog_base_html: str = BLOG_MARKDOWN_TEMPLATE % (
+            blog_title,
+            blog_time,
+            config["comment-url"],
+            config["base-homepage"],
+            config["git-url"],
+            blog_markdown.replace(
+                "<pre>", '<pre focusable="true" role="code" tabindex="0">'
+            ).replace("<blockquote>", '<blockquote focusable="true" tabindex="0">'),
+        )
+
+        blog_html_full: str = BLOG_HTML_TEMPLATE.format(
+            title=config["page-title"],
+            theme_type=config["colourscheme-type"],
+            keywords=blog_meta["keywords"].replace(" ", ", ")
+            + ", "
+            + ", ".join(config["default-keywords"]),
+            blog_description=f"Blog on {blog_time} GMT -- {blog_title}",
+            blog_title=blog_title,
+            blog=blog_base_html,
+            author=config["full-name"],
+            locale=config["locale"],
+            resource_hints=resource_hints(blog_base_html, neighbours),
+        )
+
+    return blog_html_full
+
+
+def render_blog(
+    config: Dict[str, Any],
+    blog_id: str,
+    blog_meta: Dict[str, Any],
+    phases: Optional[Dict[str, Dict[str, float]]] = None,
+    neighbours: Iterable[Optional[str]] = (),
+) -> bytes:
+    """Render and minify a single blog page"""
+
+    blog_html_full: str = render_blog_html(
+        config, blog_id, blog_meta, phases, neighbours
+    )
+
+    with timed(phases, "minify"):
+        log(f"Minifying {blog_id!r} HTML", "MINIFY")
+        blog_html_full = minify_html(blog_html_full)
+        log(f"Done minifying the HTML of {blog_id!r}", "MINIFY")
+
+    return blog_html_full.encode()
+
+
+def init_render_worker(
+    config: Dict[str, Any], neighbours: Dict[str, List[Optional[str]]]
+) -> None:
+    RENDER_CONFIG.clear()
+    RENDER_CONFIG.update(config)
+    RENDER_NEIGHBOURS.clear()
+    RENDER_NEIGHBOURS.update(neighbours)
+
+
+def render_blog_chunk(
+    chunk: List[Tuple[str, Dict[str, Any]]]
+) -> List[Tuple[str, Optional[bytes], str, Dict[str, Dict[str, float]]]]:
+    """Render a chunk of blogs in a worker process, errors are returned
+    per-blog instead of being raised so one broken blog does not
+    take the whole chunk down, along with the time of every phase"""
+
+    rendered: List[Tuple[str, Optional[bytes], str, Dict[str, Dict[str, float]]]] = []
+
+    for blog_id, blog_meta in chunk:
+        phases: Dict[str, Dict[str, float]] = {}
+
+        try:
+            rendered.append(
+                (
+                    blog_id,
+                    render_blog(
+                        RENDER_CONFIG,
+                        blog_id,
+                        blog_meta,
+                        phases,
+                        RENDER_NEIGHBOURS.get(blog_id, ()),
+                    ),
+                    "",
+                    phases,
+                )
+            )
+        except Exception as err:
+            rendered.append((blog_id, None, f"{err.__class__.__name__}: {err}", phases))
+
+    return rendered
+
+
+def balance_chunks(
+    blogs: List[Tuple[str, Dict[str, Any]]], count: int
+) -> List[List[Tuple[str, Dict[str, Any]]]]:
+    """Split blogs into `count` chunks of roughly equal content size,
+    biggest blogs first, always into the currently smallest chunk"""
+
+    chunks: List[List[Tuple[str, Dict[str, Any]]]] = [[] for _ in range(count)]
+    sizes: List[Tuple[int, int]] = [(0, idx) for idx in range(count)]
+
+    for blog in sorted(blogs, key=lambda blog: len(blog[1]["content"]), reverse=True):
+        size, idx = heappop(sizes)
+        chunks[idx].append(blog)
+        heappush(sizes, (size + len(blog[1]["content"]), idx))
+
+    return [chunk for chunk in chunks if chunk]
+
+
+def build_jobs(config: Dict[str, Any]) -> int:
+    jobs: Any = FLAGS.get("jobs") or config.get("build-jobs") or 0
+
+    try:
+        jobs = int(jobs)
+    except ValueError:
+        log(f"Invalid job count {jobs!r}, using the core count", "WARNING")
+        jobs = 0
+
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def render_code_version() -> str:
+    """Hash of the code that turns a blog into its page, so cached pages
+    get invalidated when the markdown extensions or the renderer change"""
+
+    import inspect
+
+    return hashlib.sha256(
+        "".join(
+            map(
+                inspect.getsource,
+                (
+                    sanitise_title,
+                    ari_markdown_exts,
+                    html_patterns,
+                    minify_html_to,
+                    render_markdown,
+                    font_faces,
+                    resource_hints,
+                    render_blog_html,
+                    render_blog,
+                ),
+            )
+        ).encode()
+    ).hexdigest()
+
+
+def render_cache_key(blog_hash: str, code_version: str) -> str:
+    return hashlib.sha256(f"{blog_hash}:{code_version}".encode()).hexdigest()
+
+
+def render_cache_path(key: str) -> str:
+    return os.path.join(RENDER_CACHE_DIR, key[:2], f"{key}.html")
+
+
+def render_cache_get(key: str) -> Optional[bytes]:
+    path: str = render_cache_path(key)
+
+    try:
+        with open(path, "rb") as cached:
+            content: bytes = cached.read()
+    except FileNotFoundError:
+        RENDER_CACHE_STATS["misses"] += 1
+        return None
+
+    # mtime is the last use time, it is what LRU eviction goes by
+    os.utime(path)
+    RENDER_CACHE_STATS["hits"] += 1
+
+    return content
+
+
+def render_cache_put(key: str, content: bytes) -> None:
+    path: str = render_cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(f"{path}.tmp", "wb") as cached:
+        cached.write(content)
+
+    os.replace(f"{path}.tmp", path)
+
+
+def render_cache_entries() -> List[Tuple[float, int, str]]:
+    """(last use, size, path) of every render cache entry, least
+    recently used first"""
+
+    entries: List[Tuple[float, int, str]] = []
+
+    for path in iglob(os.path.join(RENDER_CACHE_DIR, "*", "*.html")):
+        stat: os.stat_result = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    return sorted(entries)
+
+
+def render_cache_prune(budget: int) -> Tuple[int, int]:
+    entries: List[Tuple[float, int, str]] = render_cache_entries()
+    total: int = sum(size for _, size, _ in entries)
+    evicted: int = 0
+    freed: int = 0
+
+    for _, size, path in entries:
+        if total - freed <= budget:
+            break
+
+        os.remove(path)
+
+        evicted += 1
+        freed += size
+
+    RENDER_CACHE_STATS["evicted"] += evicted
+
+    return evicted, freed
+
+
+def render_cache_stats() -> str:
+    if not any(RENDER_CACHE_STATS.values()):
+        return ""
+
+    return f" (render cache: {RENDER_CACHE_STATS['hits']} hit(s), \
+{RENDER_CACHE_STATS['misses']} miss(es), {RENDER_CACHE_STATS['evicted']} evicted)"
+
+
+def keyword_index(
+    config: Dict[str, Any], index: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Inverted index of keywords to blogs which have them, along with
+    the keywords of every blog, an `index` from an earlier build is
+    updated in place so only blogs whose keywords changed are touched"""
+
+    if index is None:
+        index = {"blogs": {}, "keywords": {}}
+
+    blogs: Dict[str, str] = index["blogs"]
+    keywords: Dict[str, List[str]] = index["keywords"]
+
+    def unindex(blog_id: str) -> None:
+        for keyword in dict.fromkeys(blogs.pop(blog_id).split()):
+            keywords[keyword].remove(blog_id)
+
+            if not keywords[keyword]:
+                del keywords[keyword]
+
+    for blog_id in set(blogs) - set(config["blogs"]):
+        unindex(blog_id)
+
+    for blog_id, blog_meta in config["blogs"].items():
+        if blogs.get(blog_id) == blog_meta["keywords"]:
+            continue
+
+        if blog_id in blogs:
+            unindex(blog_id)
+
+        for keyword in dict.fromkeys(blog_meta["keywords"].split()):
+            keywords.setdefault(keyword, []).append(blog_id)
+
+        blogs[blog_id] = blog_meta["keywords"]
+
+    return index
+
+
+def listing_pages(
+    config: Dict[str, Any], keywords: Optional[Dict[str, List[str]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Every page listing blogs (home, pagination, archive and tag
+    pages) by URL path, with everything that goes on it, `keywords` is
+    the inverted keyword index, computed if it's not passed"""
+
+    import math
+
+    blog_ids: List[str] = list(reversed(config["blogs"]))
+    per_page: int = max(
+        1, config.get("posts-per-page", DEFAULT_POSTS_PER_PAGE) or len(blog_ids)
+    )
+    # Pages are numbered from the oldest blog and only full ones get
+    # one, so a new blog only changes the home page (which always lists
+    # the latest blogs) and the page it fills up, rather than shifting
+    # every page
+    page_count: int = len(blog_ids) // per_page if len(blog_ids) > per_page else 0
+
+    def blog_items(ids: List[str]) -> List[Tuple[str, str]]:
+        return [
+            (f"/{config['blog-dir']}/{blog_id}", decode_title(config["blogs"][blog_id]))
+            for blog_id in ids
+        ]
+
+    pages: Dict[str, Dict[str, Any]] = {}
+
+    pages["/"] = {
+        "header": config["home-page-header"],
+        "items": blog_items(blog_ids[:per_page]),
+        "start": len(blog_ids),
+        "pagination": [(f"/page/{page_count}", "older")] if page_count else [],
+        "latest": None,
+    }
+
+    for page in range(1, page_count + 1):
+        end: int = len(blog_ids) - (page - 1) * per_page
+
+        pages[f"/page/{page}"] = {
+            "header": config["home-page-header"],
+            "items": blog_items(blog_ids[end - per_page : end]),
+            "start": page * per_page,
+            "pagination": [
+                *([(f"/page/{page - 1}", "older")] if page > 1 else []),
+                (f"/page/{page + 1}" if page < page_count else "/", "newer"),
+            ],
+            "latest": None,
+        }
+
+    if blog_ids:
+        latest_blog: Dict[str, Any] = config["blogs"][blog_ids[0]]
+        pages["/"]["latest"] = (
+            blog_ids[0],
+            decode_title(latest_blog),
+            format_time(latest_blog["time"]),
+        )
+
+    months: Dict[str, Dict[str, List[str]]] = {}
+
+    for blog_id in blog_ids:
+        blog_time: datetime = blog_datetime(config["blogs"][blog_id]["time"])
+        months.setdefault(blog_time.strftime("%Y"), {}).setdefault(
+            blog_time.strftime("%m"), []
+        ).append(blog_id)
+
+    pages["/archive"] = {
+        "header": "Archive",
+        "items": [
+            (f"/archive/{year}", f"{year} ({sum(map(len, year_months.values()))})")
+            for year, year_months in months.items()
+        ],
+        "start": None,
+        "pagination": [],
+        "latest": None,
+    }
+
+    for year, year_months in months.items():
+        pages[f"/archive/{year}"] = {
+            "header": f"Archive: {year}",
+            "items": [
+                (
+                    f"/archive/{year}/{month}",
+                    f"{datetime(int(year), int(month), 1).strftime('%B')} \
+({len(ids)})",
+                )
+                for month, ids in year_months.items()
+            ],
+            "start": None,
+            "pagination": [],
+            "latest": None,
+        }
+
+        for month, ids in year_months.items():
+            pages[f"/archive/{year}/{month}"] = {
+                "header": f"Archive: \
+{datetime(int(year), int(month), 1).strftime('%B %Y')}",
+                "items": blog_items(ids),
+                "start": len(ids),
+                "pagination": [],
+                "latest": None,
+            }
+
+    if keywords is None:
+        keywords = keyword_index(config)["keywords"]
+
+    # Keywords are stored HTML escaped, ones which only differ in their
+    # escaping are the same tag
+    tags: Dict[str, List[str]] = {}
+
+    for keyword, ids in keywords.items():
+        tags.setdefault(html_unescape(keyword), []).extend(ids)
+
+    slugs: Set[str] = set()
+    most_used: int = max((len(dict.fromkeys(ids)) for ids in tags.values()), default=1)
+    cloud: List[Tuple[str, str, str]] = []
+
+    for keyword in sorted(tags):
+        slug: str = sanitise_title(keyword, slugs)
+        tagged: List[str] = sorted(
+            dict.fromkeys(tags[keyword]),
+            key=lambda blog_id: config["blogs"][blog_id]["time"],
+            reverse=True,
+        )
+        slugs.add(slug)
+
+        # Sizes go from 0.8em to 2em with the log of the blog count
+        size: float = (
+            0.8 + 1.2 * math.log(len(tagged)) / math.log(most_used)
+            if most_used > 1
+            else 1.0
+        )
+        cloud.append((f"/tags/{slug}", f"{keyword} ({len(tagged)})", f"{size:.2f}em"))
+        pages[f"/tags/{slug}"] = {
+            "header": f"Tag: {keyword}",
+            "items": blog_items(tagged),
+            "start": len(tagged),
+            "pagination": [],
+            "latest": None,
+        }
+
+    pages["/tags"] = {
+        "header": "Tags",
+        "items": cloud,
+        "start": None,
+        "pagination": [],
+        "latest": None,
+    }
+
+    return pages
+
+
+def listing_hash(config: Dict[str, Any], page: Dict[str, Any], *inputs: Any) -> str:
+    return hashlib.sha256(
+        ujson.dumps(
+            (
+                BLOG_VERSION,
+                HOME_PAGE_HTML_TEMPLATE,
+                *(config[key] for key in HOME_CONFIG_KEYS),
+                page,
+                *inputs,
+            )
+        ).encode()
+    ).hexdigest()
+
+
+def listing_output(path: str) -> str:
+    return os.path.join(path.strip("/"), "index.html")
+
+
+def render_listing(config: Dict[str, Any], path: str, page: Dict[str, Any]) -> bytes:
+    """Render and minify a page listing blogs or archive links, the
+    content is collected in parts and joined once"""
+
+    separator: str = '<span aria-hidden="true" role="seperator">|</span>'
+    info_bar: List[str] = []
+    content: List[str] = []
+
+    if page["latest"] is not None:
+        latest_id, latest_title, latest_time = page["latest"]
+
+        info_bar.extend(
+            (
+                f'<span role="menuitem">latest update: <time>{latest_time}</time> \
+GMT</span>',
+                separator,
+                f'<span role="menuitem">latest blog: <a \
+href="/{config["blog-dir"]}/{latest_id}">\
+{html_escape(truncate_str(latest_title, 20))}</a></span>',
+            )
+        )
+    else:
+        info_bar.append('<a role="menuitem" href="/">home</a>')
+
+    info_bar.extend(
+        (
+            separator,
+            '<a role="menuitem" href="/archive">archive</a>',
+            separator,
+            '<a role="menuitem" href="/tags">tags</a>',
+            separator,
+        )
+    )
+
+    if page["start"] is None:
+        content.append(f'<ul aria-label="{html_escape(page["header"])}">')
+    else:
+        content.append(
+            f'<ol reversed="true" start="{page["start"]}" aria-label="latest blogs">'
+        )
+
+    for href, text, *size in page["items"]:
+        content.append(
+            f'<li><a href="{href}"{f" style=font-size:{size[0]}" if size else ""}>\
+{html_escape(text)}</a></li>'
+        )
+
+    content.append("</ul>" if page["start"] is None else "</ol>")
+
+    if page["pagination"]:
+        content.append('<nav id="pages" aria-label="pages">')
+        content.append(
+            f"\n{separator}\n".join(
+                f'<a href="{page_path}">{text}</a>'
+                for page_path, text in page["pagination"]
+            )
+        )
+        content.append("</nav>")
+
+    return minify_html(
+        HOME_PAGE_HTML_TEMPLATE.format(
+            title=config["page-title"],
+            theme_type=config["colourscheme-type"],
+            keywords=", ".join(config["home-keywords"])
+            + ", "
+            + ", ".join(config["default-keywords"]),
+            home_page_description=config["page-description"],
+            info_bar="\n".join(info_bar),
+            git_url=config["git-url"],
+            content="".join(content),
+            author=config["full-name"],
+            locale=config["locale"],
+            page_header=html_escape(page["header"]),
+            resource_hints=resource_hints(HOME_PAGE_HTML_TEMPLATE + "".join(content)),
+        )
+    ).encode()
+
+
+def build_listings(
+    config: Dict[str, Any],
+    manifest: Dict[str, Any],
+    assets: Dict[str, str],
+    stylesheet: Optional[str],
+) -> None:
+    """Build listing pages whose content changed, pruning old ones, the
+    keyword index is kept in the manifest between builds"""
+
+    pages: Dict[str, Dict[str, Any]] = listing_pages(
+        config,
+        keyword_index(
+            config, manifest.setdefault("keywords", {"blogs": {}, "keywords": {}})
+        )["keywords"],
+    )
+    built: Dict[str, str] = manifest.setdefault("pages", {})
+    skipped: int = 0
+
+    for path in set(built) - set(pages):
+        log(f"Pruning listing page {path!r}", "REMOVE")
+
+        if os.path.isfile(listing_output(path)):
+            remove_output(listing_output(path))
+
+            try:
+                os.removedirs(os.path.dirname(listing_output(path)))
+            except OSError:
+                pass
+
+        del built[path]
+
+    for path, page in pages.items():
+        page_hash: str = listing_hash(config, page, assets, stylesheet, font_faces())
+
+        if built.get(path) == page_hash and os.path.isfile(listing_output(path)):
+            skipped += 1
+            continue
+
+        stage_output(
+            listing_output(path),
+            finish_page(render_listing(config, path, page), assets, stylesheet),
+        )
+        built[path] = page_hash
+        log(f"Built listing page {path!r}", "BUILD")
+
+    log(
+        f"Built {len(pages) - skipped} listing page(s), skipped {skipped} unchanged",
+        "INFO",
+    )
+
+
+def feed_time(timestamp: float) -> str:
+    return blog_datetime(timestamp).replace(microsecond=0).isoformat()
+
+
+@contextmanager
+def xml_output(path: str) -> Iterator[Any]:
+    """Stream XML into `path` through an `XMLGenerator`, it's written
+    to a temporary file renamed over `path` once it's complete"""
+
+    from xml.sax.saxutils import XMLGenerator
+
+    with open(f"{path}.tmp", "w", encoding="utf-8") as output:
+        xml: XMLGenerator = XMLGenerator(output, "utf-8", short_empty_elements=True)
+
+        xml.startDocument()
+        yield xml
+        xml.endDocument()
+
+    os.replace(f"{path}.tmp", path)
+    output_written(path)
+
+
+def xml_element(xml: Any, name: str, text: str, **attrs: str) -> None:
+    xml.startElement(name, attrs)
+    xml.characters(text)
+    xml.endElement(name)
+
+
+def write_atom_feed(config: Dict[str, Any], blog_ids: List[str]) -> None:
+    """Write the Atom feed of `blog_ids`, their content is taken from
+    the built pages"""
+
+    import re
+
+    site_url: str = config.get("site-url", DEFAULT_SITE_URL)
+
+    with xml_output(ATOM_FEED_FILE) as xml:
+        xml.startElement("feed", {"xmlns": "http://www.w3.org/2005/Atom"})
+
+        xml_element(xml, "id", site_url)
+        xml_element(xml, "title", config["page-title"])
+        xml_element(xml, "subtitle", config["page-description"])
+        xml_element(
+            xml,
+            "updated",
+            feed_time(config["blogs"][blog_ids[0]]["time"] if blog_ids else 0),
+        )
+        xml_element(xml, "generator", "Ari-web blog generator")
+        xml.startElement("link", {"href": site_url})
+        xml.endElement("link")
+        xml.startElement("link", {"rel": "self", "href": f"{site_url}{ATOM_FEED_FILE}"})
+        xml.endElement("link")
+        xml.startElement("author", {})
+        xml_element(xml, "name", config["full-name"])
+        xml.endElement("author")
+
+        for blog_id in blog_ids:
+            blog_meta: Dict[str, Any] = config["blogs"][blog_id]
+            blog_url: str = f"{site_url}{config['blog-dir']}/{blog_id}"
+
+            with open(
+                os.path.join(config["blog-dir"], blog_id, "index.html"), "r"
+            ) as page:
+                article: Optional[RegexMatch] = re.search(  # type: ignore
+                    r"<article[^>]*>(.*)</article>", page.read(), re.S
+                )
+
+            xml.startElement("entry", {"xml:base": blog_url})
+            xml_element(xml, "id", blog_url)
+            xml_element(xml, "title", decode_title(blog_meta))
+            xml_element(xml, "published", feed_time(blog_meta["time"]))
+            xml_element(xml, "updated", feed_time(blog_meta["time"]))
+            xml.startElement("link", {"href": blog_url})
+            xml.endElement("link")
+
+            # Keywords are stored HTML escaped, the XML writer escapes them
+            for keyword in dict.fromkeys(
+                map(html_unescape, blog_meta["keywords"].split())
+            ):
+                xml.startElement("category", {"term": keyword})
+                xml.endElement("category")
+
+            xml_element(
+                xml, "content", "" if article is None else article.group(1), type="html"
+            )
+            xml.endElement("entry")
+
+        xml.endElement("feed")
+
+
+def write_sitemap(config: Dict[str, Any], paths: List[str]) -> None:
+    """Write the sitemap of listing pages at `paths` and every blog"""
+
+    from urllib.parse import quote
+
+    site_url: str = config.get("site-url", DEFAULT_SITE_URL)
+
+    with xml_output(SITEMAP_FILE) as xml:
+        xml.startElement(
+            "urlset", {"xmlns": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+        )
+
+        for path in paths:
+            xml.startElement("url", {})
+            xml_element(xml, "loc", f"{site_url}{quote(path.lstrip('/'))}")
+            xml.endElement("url")
+
+        for blog_id, blog_meta in config["blogs"].items():
+            xml.startElement("url", {})
+            xml_element(
+                xml, "loc", f"{site_url}{quote(config['blog-dir'])}/{quote(blog_id)}"
+            )
+            xml_element(xml, "lastmod", feed_time(blog_meta["time"]))
+            xml.endElement("url")
+
+        xml.endElement("urlset")
+
+
+def build_feeds(config: Dict[str, Any], manifest: Dict[str, Any]) -> None:
+    """Write the Atom feed and the sitemap if the blogs in them (or
+    their build hashes) changed"""
+
+    built: Dict[str, str] = manifest.setdefault("feeds", {})
+    site: Tuple[Any, ...] = (
+        BLOG_VERSION,
+        config.get("site-url", DEFAULT_SITE_URL),
+        *(config[key] for key in HOME_CONFIG_KEYS),
+    )
+    blog_ids: List[str] = [
+        blog_id
+        for blog_id in sorted(
+            config["blogs"],
+            key=lambda blog_id: config["blogs"][blog_id]["time"],
+            reverse=True,
+        )
+        if blog_id in manifest["blogs"]
+    ][: config.get("feed-posts", DEFAULT_FEED_POSTS)]
+    paths: List[str] = sorted(manifest.get("pages", {}))
+
+    feeds: Dict[str, Tuple[str, Callable[[], None]]] = {
+        ATOM_FEED_FILE: (
+            ujson.dumps(
+                (site, [(blog_id, manifest["blogs"][blog_id]) for blog_id in blog_ids])
+            ),
+            lambda: write_atom_feed(config, blog_ids),
+        ),
+        SITEMAP_FILE: (
+            ujson.dumps(
+                (
+                    site,
+                    paths,
+                    [
+                        (blog_id, blog_meta["time"])
+                        for blog_id, blog_meta in config["blogs"].items()
+                    ],
+                )
+            ),
+            lambda: write_sitemap(config, paths),
+        ),
+    }
+
+    for file, (inputs, write) in feeds.items():
+        feed_hash: str = hashlib.sha256(inputs.encode()).hexdigest()
+
+        if built.get(file) == feed_hash and os.path.isfile(file):
+            log(f"{file!r} is unchanged", "INFO")
+            continue
+
+        write()
+        built[file] = feed_hash
+        log(f"Generated {file!r}", "GENERATE")
+
+
+def build(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Build, minimise and generate site"""
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if not config["blogs"]:
+        return log("No blogs to build"), config
+
+    # Pages are staged and swapped in once they're all built, whatever
+    # is left over in staging is from a build which didn't finish
+    rmtree(OUTPUT_STAGING_DIR, ignore_errors=True)
+    os.makedirs(config["blog-dir"], exist_ok=True)
+
+    stages: Optional[Dict[str, Dict[str, float]]] = profile_stages()
+    blog_phases: Optional[Dict[str, Dict[str, Dict[str, float]]]] = (
+        None if stages is None else PROFILE["blogs"]
+    )
+
+    manifest: Dict[str, Any] = load_manifest("blogs", "pages", "keywords", "feeds")
+
+    with timed(stages, "build: prune"):
+        pruned: int = prune_blogs(config, manifest)
+
+    assets: Dict[str, str] = asset_urls()
+    stylesheet: Optional[str] = (
+        critical_css_stylesheet() if config.get("inline-css") else None
+    )
+    fingerprint: str = build_fingerprint(config, assets, stylesheet, font_faces())
+    neighbours: Dict[str, List[Optional[str]]] = blog_neighbours(config)
+
+    log("Building blogs...", "INFO")
+
+    pending: List[Tuple[str, Dict[str, Any]]] = []
+    hashes: Dict[str, str] = {}
+
+    for blog_id, blog_meta in config["blogs"].items():
+        hashes[blog_id] = blog_build_hash(
+            fingerprint, blog_id, blog_meta, neighbours[blog_id]
+        )
+
+        if manifest["blogs"].get(blog_id) == hashes[blog_id] and os.path.isfile(
+            os.path.join(config["blog-dir"], blog_id, "index.html")
+        ):
+            continue
+
+        manifest["blogs"].pop(blog_id, None)
+        pending.append((blog_id, blog_meta))
+
+    failed: int = 0
+    code_version: str = render_code_version()
+    cache_keys: Dict[str, str] = {}
+    to_render: List[Tuple[str, Dict[str, Any]]] = []
+
+    def write_blog(blog_id: str, blog_html: bytes) -> None:
+        with timed(
+            None if blog_phases is None else blog_phases.setdefault(blog_id, {}),
+            "write",
+        ):
+            stage_output(
+                os.path.join(config["blog-dir"], blog_id, "index.html"),
+                finish_page(blog_html, assets, stylesheet),
+            )
+
+        manifest["blogs"][blog_id] = hashes[blog_id]
+        log(f"Finished building blog {blog_id!r}", "BUILD")
+
+    for blog_id, blog_meta in pending:
+        cache_keys[blog_id] = render_cache_key(hashes[blog_id], code_version)
+
+        with timed(
+            None if blog_phases is None else blog_phases.setdefault(blog_id, {}),
+            "cache",
+        ):
+            cached: Optional[bytes] = (
+                None if "full" in FLAGS else render_cache_get(cache_keys[blog_id])
+            )
+
+        if cached is None:
+            to_render.append((blog_id, blog_meta))
+        else:
+            write_blog(blog_id, cached)
+
+    if to_render:
+        jobs: int = build_jobs(config)
+        chunks: List[List[Tuple[str, Dict[str, Any]]]] = balance_chunks(
+            to_render, min(len(to_render), jobs * RENDER_CHUNKS_PER_JOB)
+        )
+
+        log(f"Rendering {len(to_render)} blog(s) on {jobs} worker(s)", "INFO")
+
+        with timed(stages, "build: render"), ProcessPoolExecutor(
+            max_workers=min(jobs, len(chunks)),
+            initializer=init_render_worker,
+            initargs=({key: config[key] for key in BUILD_CONFIG_KEYS}, neighbours),
+        ) as pool:
+            futures: Dict[Future[Any], List[Tuple[str, Dict[str, Any]]]] = {
+                pool.submit(render_blog_chunk, chunk): chunk for chunk in chunks
+            }
+
+            for future in as_completed(futures):
+                try:
+                    rendered: List[
+                        Tuple[str, Optional[bytes], str, Dict[str, Dict[str, float]]]
+                    ] = future.result()
+                except Exception as err:
+                    rendered = [
+                        (blog_id, None, f"worker failed: {err}", {})
+                        for blog_id, _ in futures[future]
+                    ]
+
+                for blog_id, blog_html, error, phases in rendered:
+                    if blog_phases is not None:
+                        blog_phases.setdefault(blog_id, {}).update(phases)
+
+                    if blog_html is None:
+                        log(f"Failed to build blog {blog_id!r}: {error}")
+                        failed += 1
+                        continue
+
+                    render_cache_put(cache_keys[blog_id], blog_html)
+                    write_blog(blog_id, blog_html)
+
+    with timed(stages, "build: render cache prune"):
+        render_cache_prune(config.get("render-cache-bytes", DEFAULT_RENDER_CACHE_BYTES))
+
+    log(
+        f"Built {len(pending) - failed} blog(s), skipped \
+{len(config['blogs']) - len(pending)} unchanged, pruned {pruned} removed, \
+{failed} failed",
+        "INFO",
+    )
+
+    log("Building listing pages...", "INFO")
+
+    with timed(stages, "build: listing pages"):
+        build_listings(config, manifest, assets, stylesheet)
+
+    with timed(stages, "build: swap"):
+        log(f"Swapped in {swap_outputs()} changed page(s)", "INFO")
+
+    with timed(stages, "build: feeds"):
+        build_feeds(config, manifest)
+
+    dump_manifest(manifest)
+
+    if failed:
+        return log(f"{failed} blog(s) failed to build"), config
+
+    return EXIT_OK, config
+
+
+def list_blogs(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """List blogs"""
+
+    if not config["blogs"]:
+        return log("No blogs to list"), config
+
+    for blog_id, blog_meta in config["blogs"].items():
+        print(
+            f"""ID: {blog_id}
+Title: {decode_title(blog_meta)!r}
+Version: {blog_meta["version"]}
+Time_of_creation: {format_time(blog_meta["time"])}
+Keywords: {blog_meta['keywords'].replace(" ", ", ")}
+"""
+        )
+
+    return EXIT_OK, config
+
+
+def remove_blog(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Remove a blog page"""
+
+    if not config["blogs"]:
+        return log("No blogs to remove"), config
+
+    blog_id: str = pick_blog(config)
+
+    if not blog_id:
+        return EXIT_ERR, config
+
+    del config["blogs"][blog_id]
+    journal_remove(blog_id)
+
+    return EXIT_OK, config
+
+
+def migrate(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Migrate blogs to the current storage format"""
+
+    migrated: int = 0
+
+    for blog_id, blog_meta in config["blogs"].items():
+        if upgrade_blog(blog_meta):
+            log(f"Migrated {blog_id!r} to version {BLOG_VERSION}", "MIGRATE")
+            migrated += 1
+
+    log(f"Migrated {migrated} blog(s)", "INFO")
+
+    if migrated:
+        compact_config(config)
+
+    return EXIT_OK, config
+
+
+def dummy(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Print help/usage information"""
+
+    return EXIT_OK, config
+
+
+def edit_title(blog: str, config: Dict[str, Any]) -> int:
+    new_title: str = iinput("edit title", decode_title(config["blogs"][blog]))
+
+    if not new_title.strip():
+        return log("New title cannot be empty")
+
+    # Made it not change the slug
+
+    # old_blog: dict = config["blogs"][blog].copy()
+    # old_blog["title"] = b64encode(new_title.encode()).decode()
+    # del config["blogs"][blog]
+
+    # config["blogs"][sanitise_title(new_title, config["blogs"])] = old_blog
+    # del old_blog
+
+    upgrade_blog(config["blogs"][blog])
+    config["blogs"][blog]["title"] = new_title
+
+    return EXIT_OK
+
+
+def edit_keywords(blog: str, config: Dict[str, Any]) -> int:
+    new_keywords: str = iinput("edit keywords", config["blogs"][blog]["keywords"])
+
+    if not new_keywords.strip():
+        return log("Keywords cannot be empty")
+
+    config["blogs"][blog]["keywords"] = new_keywords
+
+    return EXIT_OK
+
+
+def edit_content(blog: str, config: Dict[str, Any]) -> int:
+    file: str = tmp_path(f"{blog}.md")
+
+    with open(file, "w") as blog_md:
+        blog_md.write(decode_content(config["blogs"][blog]))
+
+    editor(config, file)
+
+    with open(file, "r") as blog_md_new:
+        content: str = blog_md_new.read()
+
+        if not content.strip():
+            blog_md_new.close()
+            return log("Content of a blog cannot be empty")
+
+        upgrade_blog(config["blogs"][blog])
+        config["blogs"][blog]["content"] = content
+
+    return EXIT_OK
+
+
+EDIT_HOOKS: Dict[str, Callable[[str, Dict[str, Any]], int]] = {
+    "quit": lambda *_: EXIT_OK,  # pyright: ignore
+    "title": edit_title,
+    "keywords": edit_keywords,
+    "content": edit_content,
+}
+
+
+def edit(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Edit a blog"""
+
+    from plumbum.commands.processes import ProcessExecutionError  # type: ignore
+    from pyfzf import FzfPrompt  # type: ignore
+
+    if not config["blogs"]:
+        return log("No blogs to edit"), config
+
+    blog_id: str = pick_blog(config)
+
+    if not blog_id:
+        return EXIT_ERR, config
+
+    try:
+        hook: str = FzfPrompt().prompt(  # pyright: ignore
+            EDIT_HOOKS.keys(), "--prompt='What to edit: '"
+        )[0]
+
+        if hook not in EDIT_HOOKS:
+            return log(f"Hook {hook!r} does not exist"), config
+
+        if EDIT_HOOKS[hook](blog_id, config) == EXIT_OK and hook != "quit":
+            journal_set(blog_id, config["blogs"][blog_id])
+    except ProcessExecutionError:
+        return log("No blog selected"), config
+
+    return EXIT_OK, config
 
 
 def gen_def_config(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
@@ -778,40 +3170,320 @@ def gen_def_config(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
         if iinput("Do you want to overwite config? (y/n)").lower()[0] != "y":
             return log("Not overwritting config", "INFO", EXIT_OK), config
 
-    new_config()
+    new_config()
+
+    return EXIT_OK, load_config()
+
+
+def clean(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Clean up current directory"""
+
+    TRASH: Set[str] = {
+        HISTORY_FILE,
+        BUILD_MANIFEST_FILE,
+        config["blog-dir"],
+        "index.html",
+        "index.html.*",
+        "page",
+        "archive",
+        "tags",
+        "content/*.min.*",
+        "blog_json_hash.txt",
+        "manifest.json",
+        "content/fonts/*.min.*",
+        "content/fonts/*.*.woff*",
+        "content/fonts/*.subset.*",
+        HEADERS_FILE,
+        ATOM_FEED_FILE,
+        f"{ATOM_FEED_FILE}.*",
+        SITEMAP_FILE,
+        f"{SITEMAP_FILE}.*",
+        API_DIR,
+        SEARCH_DIR,
+        "*.json.gz",
+        "*.json.zst",
+    }
+
+    def remove(file: str) -> None:
+        log(f"Removing {file!r}", "REMOVE")
+
+        if file in {HISTORY_FILE, BUILD_MANIFEST_FILE}:
+            os.remove(file)
+        else:
+            remove_output(file)
+
+    for glob_ex in TRASH:
+        for file in iglob(glob_ex, recursive=True):
+            remove(file)
+
+    MANIFEST.clear()
+
+    open(HISTORY_FILE, "w").close()
+
+    return EXIT_OK, config
+
+
+def api_post_file(blog_id: str) -> str:
+    return os.path.join(API_DIR, "posts", f"{blog_id}.json")
+
+
+def api_post_hash(blog_meta: Dict[str, Any]) -> str:
+    return hashlib.sha256(
+        ujson.dumps(
+            (
+                decode_title(blog_meta),
+                content_hash(blog_meta),
+                blog_meta["time"],
+                blog_meta["keywords"],
+            )
+        ).encode()
+    ).hexdigest()
+
+
+def generate_api(config: Dict[str, Any]) -> None:
+    """Generate the split JSON API: a light index of blogs, a file per
+    blog and the blogs which changed in recent build generations, so
+    clients only fetch blogs whose hashes changed
+
+    The state of the API (generations and hashes) is kept in the
+    render cache, post files are only written for changed blogs,
+    generations are build times (`SOURCE_DATE_EPOCH` if it's set), so
+    they keep going up even when the state is lost (like on fresh
+    checkouts)"""
+
+    state: Dict[str, Any] = {"generation": 0, "hashes": {}, "changes": []}
+
+    if os.path.isfile(API_STATE_FILE):
+        try:
+            with open(API_STATE_FILE, "r") as state_file:
+                state = ujson.load(state_file)
+        except ValueError:
+            log(f"{API_STATE_FILE!r} is corrupt, starting a new generation", "WARNING")
+
+    hashes: Dict[str, str] = {
+        blog_id: api_post_hash(blog_meta)
+        for blog_id, blog_meta in config["blogs"].items()
+    }
+    changed: Dict[str, str] = {
+        blog_id: blog_hash
+        for blog_id, blog_hash in hashes.items()
+        if state["hashes"].get(blog_id) != blog_hash
+    }
+    removed: List[str] = sorted(set(state["hashes"]) - set(hashes))
+
+    for blog_id in removed:
+        if os.path.isfile(api_post_file(blog_id)):
+            remove_output(api_post_file(blog_id))
+
+    for blog_id, blog_meta in config["blogs"].items():
+        if blog_id not in changed and os.path.isfile(api_post_file(blog_id)):
+            continue
+
+        write_output(
+            api_post_file(blog_id),
+            ujson.dumps(
+                {
+                    "id": blog_id,
+                    "title": decode_title(blog_meta),
+                    "content": decode_content(blog_meta),
+                    "time": blog_meta["time"],
+                    "keywords": blog_meta["keywords"],
+                    "hash": hashes[blog_id],
+                }
+            ).encode(),
+        )
+
+    if changed or removed:
+        state["generation"] = max(
+            state["generation"] + 1,
+            int(os.getenv("SOURCE_DATE_EPOCH") or datetime.now().timestamp()),
+        )
+
+        # A new state has every blog changed, clients have to start off
+        # the index anyway
+        if state["hashes"]:
+            state["changes"] = [
+                {
+                    "generation": state["generation"],
+                    "changed": changed,
+                    "removed": removed,
+                },
+                *state["changes"],
+            ][:API_GENERATIONS]
+
+    state["hashes"] = hashes
+
+    write_output(
+        os.path.join(API_DIR, "index.json"),
+        ujson.dumps(
+            {
+                "generation": state["generation"],
+                "posts": [
+                    {
+                        "id": blog_id,
+                        "title": decode_title(blog_meta),
+                        "time": blog_meta["time"],
+                        "keywords": blog_meta["keywords"],
+                        "hash": hashes[blog_id],
+                    }
+                    for blog_id, blog_meta in config["blogs"].items()
+                ],
+            }
+        ).encode(),
+    )
+    write_output(
+        os.path.join(API_DIR, "changes.json"),
+        ujson.dumps(
+            {
+                "generation": state["generation"],
+                "since": state["changes"][-1]["generation"] - 1
+                if state["changes"]
+                else state["generation"],
+                "generations": state["changes"],
+            }
+        ).encode(),
+    )
+
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+    atomic_dump(API_STATE_FILE, state, 0)
+
+    log(
+        f"API generation {state['generation']}: {len(changed)} changed, \
+{len(removed)} removed blog(s)",
+        "GENERATE",
+    )
+
+
+def search_terms(text: str) -> Dict[str, int]:
+    """Terms of `text` and how many times each is in it, terms are case
+    folded words without accents, skipping stop words"""
+
+    import re
+    import unicodedata
+
+    terms: Dict[str, int] = {}
+
+    for term in re.findall(r"[^\W_]+", unicodedata.normalize("NFC", text.casefold())):
+        # Most words are ASCII, only the others need their accents dropped
+        if not term.isascii():
+            term = "".join(
+                char
+                for char in unicodedata.normalize("NFKD", term)
+                if not unicodedata.combining(char)
+            )
+
+        if (
+            SEARCH_MIN_TERM_LENGTH <= len(term) <= SEARCH_MAX_TERM_LENGTH
+            and term not in SEARCH_STOP_WORDS
+        ):
+            terms[term] = terms.get(term, 0) + 1
 
-    with open(DEFAULT_CONFIG_FILE, "r") as cfg:
-        config = ujson.load(cfg)
+    return terms
 
-    return EXIT_OK, config
 
+def search_shard_file(prefix: str) -> str:
+    return os.path.join(SEARCH_DIR, f"{prefix}.json")
 
-def clean(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-    """Clean up current directory"""
 
-    TRASH: Set[str] = {
-        HISTORY_FILE,
-        config["blog-dir"],
-        "index.html",
-        "content/*.min.*",
-        "blog_json_hash.txt",
-        "manifest.json",
-        "content/fonts/*.min.*",
-    }
+def build_search(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Build the search index, only re-indexing changed blogs"""
 
-    def remove(file: str) -> None:
-        log(f"Removing {file!r}", "REMOVE")
+    index: Dict[str, Any] = {"blogs": {}, "shards": {}}
 
+    if "full" not in FLAGS and os.path.isfile(SEARCH_INDEX_FILE):
         try:
-            os.remove(file)
-        except IsADirectoryError:
-            rmtree(file)
+            with open(SEARCH_INDEX_FILE, "r") as index_file:
+                index = ujson.load(index_file)
+        except ValueError:
+            log(f"{SEARCH_INDEX_FILE!r} is corrupt, reindexing every blog", "WARNING")
 
-    for glob_ex in TRASH:
-        for file in iglob(glob_ex, recursive=True):
-            remove(file)
+    blogs: Dict[str, List[Any]] = index["blogs"]
+    shards: Dict[str, Dict[str, Dict[str, int]]] = index["shards"]
+    dirty: Set[str] = set()
 
-    open(HISTORY_FILE, "w").close()
+    def unindex(blog_id: str) -> None:
+        for term in blogs.pop(blog_id)[1]:
+            shard: Dict[str, Dict[str, int]] = shards[term[:SEARCH_PREFIX_LENGTH]]
+            shard[term].pop(blog_id, None)
+            dirty.add(term[:SEARCH_PREFIX_LENGTH])
+
+            if not shard[term]:
+                del shard[term]
+
+    for blog_id in set(blogs) - set(config["blogs"]):
+        unindex(blog_id)
+
+    indexed: int = 0
+
+    for blog_id, blog_meta in config["blogs"].items():
+        blog_hash: str = hashlib.sha256(
+            f"{decode_title(blog_meta)}:{content_hash(blog_meta)}".encode()
+        ).hexdigest()
+
+        if blog_id in blogs:
+            if blogs[blog_id][0] == blog_hash:
+                continue
+
+            unindex(blog_id)
+
+        terms: Dict[str, int] = search_terms(
+            f"{decode_title(blog_meta)}\n{decode_content(blog_meta)}"
+        )
+
+        for term, count in terms.items():
+            shards.setdefault(term[:SEARCH_PREFIX_LENGTH], {}).setdefault(term, {})[
+                blog_id
+            ] = count
+            dirty.add(term[:SEARCH_PREFIX_LENGTH])
+
+        blogs[blog_id] = [blog_hash, sorted(terms)]
+        indexed += 1
+
+    dirty.update(
+        prefix for prefix in shards if not os.path.isfile(search_shard_file(prefix))
+    )
+
+    written: int = 0
+
+    for prefix in sorted(dirty):
+        if not shards.get(prefix):
+            shards.pop(prefix, None)
+            continue
+
+        # Blogs of every term go from the most to the least mentions
+        written += write_output(
+            search_shard_file(prefix),
+            ujson.dumps(
+                {
+                    term: dict(
+                        sorted(postings.items(), key=lambda post: (-post[1], post[0]))
+                    )
+                    for term, postings in sorted(shards[prefix].items())
+                }
+            ).encode(),
+        )
+
+    for file in iglob(search_shard_file("*")):
+        if os.path.basename(file)[:-5] not in shards and not file.endswith(
+            "shards.json"
+        ):
+            remove_output(file)
+
+    write_output(
+        os.path.join(SEARCH_DIR, "shards.json"),
+        ujson.dumps(
+            {"prefix-length": SEARCH_PREFIX_LENGTH, "shards": sorted(shards)}
+        ).encode(),
+    )
+
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+    atomic_dump(SEARCH_INDEX_FILE, index, 0)
+
+    log(
+        f"Indexed {indexed} blog(s), {len(blogs) - indexed} unchanged, wrote \
+{written} of {len(shards)} shard(s)",
+        "SEARCH",
+    )
 
     return EXIT_OK, config
 
@@ -819,9 +3491,10 @@ def clean(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
 def generate_metadata(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
     """Generate metadata"""
 
-    with open("manifest.json", "w") as manifest:
-        log(f"Generating {manifest.name}...", "GENERATE")
-        ujson.dump(
+    log("Generating manifest.json...", "GENERATE")
+    write_output(
+        "manifest.json",
+        ujson.dumps(
             {
                 "$schema": "https://json.schemastore.org/web-manifest-combined.json",
                 "short_name": config["short-name"],
@@ -833,16 +3506,179 @@ def generate_metadata(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
                 "theme_color": config["theme-colour"],
                 "background_color": config["background-colour"],
             },
-            manifest,
-        )
+        ).encode(),
+    )
 
     with open(DEFAULT_CONFIG_FILE, "rb") as blog_api_file:
         log(f"Generating hash for {DEFAULT_CONFIG_FILE!r}", "HASH")
+        write_output(
+            f"{DEFAULT_CONFIG_FILE.replace('.', '_')}_hash.txt",
+            hashlib.sha256(blog_api_file.read()).hexdigest().encode(),
+        )
+
+    log(f"Generating the {API_DIR!r} API...", "GENERATE")
+    generate_api(config)
+
+    return EXIT_OK, config
+
+
+def compress_artifacts(config: Dict[str, Any]) -> List[str]:
+    """Every generated text file worth serving pre-compressed"""
+
+    globs: Tuple[str, ...] = (
+        "index.html",
+        "page/**/index.html",
+        "archive/**/index.html",
+        "tags/**/index.html",
+        f"{config['blog-dir']}/**/index.html",
+        "content/**/*.min.css",
+        "manifest.json",
+        ATOM_FEED_FILE,
+        SITEMAP_FILE,
+        f"{API_DIR}/**/*.json",
+        f"{SEARCH_DIR}/*.json",
+        DEFAULT_CONFIG_FILE,
+    )
+
+    return sorted(
+        {
+            file
+            for glob_ex in globs
+            for file in iglob(glob_ex, recursive=True)
+            if os.path.isfile(file)
+        }
+    )
+
 
-        with open(
-            f"{DEFAULT_CONFIG_FILE.replace('.', '_')}_hash.txt", "w"
-        ) as blog_api_hash:
-            blog_api_hash.write(hashlib.sha256(blog_api_file.read()).hexdigest())
+def compress_file(file: str) -> Tuple[str, int, int, Optional[int]]:
+    """Write `.gz` and, if `zstandard` is installed, `.zst` files next
+    to `file`, returning the original and compressed sizes"""
+
+    import gzip
+
+    with open(file, "rb") as source:
+        data: bytes = source.read()
+
+    compressed: bytes = gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+    with open(f"{file}.gz", "wb") as gz_file:
+        gz_file.write(compressed)
+
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        return file, len(data), len(compressed), None
+
+    zst: bytes = zstandard.ZstdCompressor(
+        level=zstandard.MAX_COMPRESSION_LEVEL
+    ).compress(data)
+
+    with open(f"{file}.zst", "wb") as zst_file:
+        zst_file.write(zst)
+
+    return file, len(data), len(compressed), len(zst)
+
+
+def compress(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Pre-compress generated files"""
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    manifest: Dict[str, Any] = load_manifest("compressed")
+    compressed: Dict[str, List[Any]] = manifest.setdefault("compressed", {})
+    artifacts: List[str] = compress_artifacts(config)
+    pending: List[str] = []
+    hashes: Dict[str, str] = {}
+
+    for file in set(compressed) - set(artifacts):
+        for side_file in f"{file}.gz", f"{file}.zst":
+            if os.path.isfile(side_file):
+                remove_output(side_file)
+
+        del compressed[file]
+
+    for file in artifacts:
+        with open(file, "rb") as source:
+            hashes[file] = hashlib.sha256(source.read()).hexdigest()
+
+        entry: Optional[List[Any]] = compressed.get(file)
+
+        if (
+            entry is None
+            or entry[0] != hashes[file]
+            or not os.path.isfile(f"{file}.gz")
+            or (entry[3] is not None and not os.path.isfile(f"{file}.zst"))
+        ):
+            pending.append(file)
+
+    if pending:
+        jobs: int = min(build_jobs(config), len(pending))
+
+        log(f"Compressing {len(pending)} file(s) on {jobs} worker(s)", "INFO")
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for file, size, gz_size, zst_size in pool.map(
+                compress_file, pending, chunksize=max(1, len(pending) // (jobs * 4))
+            ):
+                compressed[file] = [hashes[file], size, gz_size, zst_size]
+                output_written(f"{file}.gz")
+
+                if zst_size is not None:
+                    output_written(f"{file}.zst")
+
+                log(f"Compressed {file!r}", "COMPRESS")
+
+    dump_manifest(manifest)
+
+    size: int = sum(entry[1] for entry in compressed.values())
+    gz_saved: int = size - sum(entry[2] for entry in compressed.values())
+    zst_entries: List[List[Any]] = [
+        entry for entry in compressed.values() if entry[3] is not None
+    ]
+
+    log(
+        f"Compressed {len(pending)} file(s), skipped \
+{len(artifacts) - len(pending)} unchanged, gzip saves {gz_saved} of {size} bytes",
+        "INFO",
+    )
+
+    if zst_entries:
+        log(
+            f"zstd saves {sum(entry[1] - entry[3] for entry in zst_entries)} of \
+{sum(entry[1] for entry in zst_entries)} bytes",
+            "INFO",
+        )
+
+    return EXIT_OK, config
+
+
+def cache(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Inspect and prune the render cache"""
+
+    budget: int = config.get("render-cache-bytes", DEFAULT_RENDER_CACHE_BYTES)
+
+    if "clear" in FLAGS:
+        evicted, freed = render_cache_prune(0)
+        log(f"Cleared {evicted} entries ({freed} bytes)", "CACHE")
+    elif "prune" in FLAGS:
+        evicted, freed = render_cache_prune(budget)
+        log(f"Evicted {evicted} entries ({freed} bytes)", "CACHE")
+
+    entries: List[Tuple[float, int, str]] = render_cache_entries()
+    total: int = sum(size for _, size, _ in entries)
+
+    print(
+        f"""Directory: {RENDER_CACHE_DIR}
+Entries: {len(entries)}
+Size: {total} bytes
+Budget: {budget} bytes ({total / budget * 100 if budget else 100:.1f}% used)"""
+    )
+
+    if entries:
+        print(
+            f"""Least_recently_used: {format_time(entries[0][0])}
+Most_recently_used: {format_time(entries[-1][0])}"""
+        )
 
     return EXIT_OK, config
 
@@ -851,15 +3687,26 @@ def generate_static_full(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
     """Generate full static site"""
 
     BUILD_CFG: Dict[str, Callable[[Dict[str, Any]], Tuple[int, Dict[str, Any]]]] = {
-        "Cleaning up": clean,
         "Building CSS": build_css,
+        "Subsetting fonts": subset_fonts,
+        "Fingerprinting assets": fingerprint_assets,
         "Building static site": build,
         "Generating metatata": generate_metadata,
+        "Building search index": build_search,
+        "Generating headers": generate_headers,
     }
 
+    if "full" in FLAGS:
+        BUILD_CFG = {"Cleaning up": clean, **BUILD_CFG}
+
+    if "compress" in FLAGS or config.get("compress"):
+        BUILD_CFG["Compressing"] = compress
+
     for logger_msg, function in BUILD_CFG.items():
         log(f"{logger_msg}...", "STATIC")
-        code, config = function(config)
+
+        with timed(profile_stages(), logger_msg):
+            code, config = function(config)
 
         if code != EXIT_OK:
             log("Failed to generate static site")
@@ -868,6 +3715,384 @@ def generate_static_full(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
     return EXIT_OK, config
 
 
+def profile_blog(config: Dict[str, Any], blog_id: str) -> int:
+    """Dump a `cProfile` profile of rendering a single blog, the blog
+    is rendered once before so engine setup isn't counted"""
+
+    import cProfile
+
+    if blog_id not in config["blogs"]:
+        return log(f"Cannot profile {blog_id!r}: no such blog")
+
+    render_blog(config, blog_id, config["blogs"][blog_id])
+
+    profiler: cProfile.Profile = cProfile.Profile()
+    profiler.runcall(render_blog, config, blog_id, config["blogs"][blog_id])
+    profiler.dump_stats(PROFILE_DUMP_FILE)
+
+    log(f"Profile of rendering {blog_id!r} dumped to {PROFILE_DUMP_FILE!r}", "PROFILE")
+
+    return EXIT_OK
+
+
+def profile_report(subcommand: str, wall: float, cpu: float) -> None:
+    """Write the JSON profile report and print the slowest blogs"""
+
+    def total(timings: Dict[str, Dict[str, float]], kind: str = "wall") -> float:
+        return sum(timing[kind] for timing in timings.values())
+
+    phases: Dict[str, Dict[str, float]] = {}
+
+    for blog_timings in PROFILE["blogs"].values():
+        for phase, timing in blog_timings.items():
+            phase_total: Dict[str, float] = phases.setdefault(
+                phase, {"wall": 0.0, "cpu": 0.0}
+            )
+            phase_total["wall"] += timing["wall"]
+            phase_total["cpu"] += timing["cpu"]
+
+    slowest: List[Tuple[str, Dict[str, Dict[str, float]]]] = sorted(
+        PROFILE["blogs"].items(), key=lambda item: total(item[1]), reverse=True
+    )[:PROFILE_TOP_BLOGS]
+
+    report_file: str = FLAGS.get("profile") or PROFILE_REPORT_FILE
+
+    with open(report_file, "w") as report:
+        ujson.dump(
+            {
+                "subcommand": subcommand,
+                "total": {"wall": wall, "cpu": cpu},
+                "stages": PROFILE["stages"],
+                "phases": phases,
+                "blogs": PROFILE["blogs"],
+                "slowest": [blog_id for blog_id, _ in slowest],
+            },
+            report,
+            indent=4,
+        )
+
+    print(f"Profile report: {report_file}")
+
+    for stage, timing in PROFILE["stages"].items():
+        print(f"  {stage:40s}{timing['wall']:10.4f} s wall{timing['cpu']:10.4f} s cpu")
+
+    if not slowest:
+        return
+
+    print(f"Slowest {len(slowest)} blog(s):")
+
+    for blog_id, timings in slowest:
+        print(
+            f"  {total(timings) * 1000:10.3f} ms  {blog_id} ("
+            + ", ".join(
+                f"{phase} {timing['wall'] * 1000:.3f}"
+                for phase, timing in timings.items()
+            )
+            + ")"
+        )
+
+
+def netlify_redirects() -> List[Dict[str, Any]]:
+    """Parse the `[[redirects]]` tables out of the netlify config, only
+    as much of TOML as that file actually uses is supported"""
+
+    redirects: List[Dict[str, Any]] = []
+    redirect: Optional[Dict[str, Any]] = None
+
+    if not os.path.isfile(NETLIFY_CONFIG_FILE):
+        return redirects
+
+    with open(NETLIFY_CONFIG_FILE, "r") as netlify_config:
+        for line in map(str.strip, netlify_config):
+            if not line or line.startswith("#"):
+                continue
+
+            if line.startswith("["):
+                redirect = {} if line == "[[redirects]]" else None
+
+                if redirect is not None:
+                    redirects.append(redirect)
+            elif redirect is not None and "=" in line:
+                key, value = map(str.strip, line.split("=", 1))
+                redirect[key] = ujson.loads(value)
+
+    return redirects
+
+
+def match_redirect(redirect: Dict[str, Any], path: str) -> Optional[str]:
+    """Match a path against a netlify redirect, returning the target with
+    `:placeholder`s and `:splat` substituted if it matches"""
+
+    params: Dict[str, str] = {}
+    pattern: List[str] = redirect["from"].strip("/").split("/")
+    parts: List[str] = path.strip("/").split("/")
+
+    for idx, part in enumerate(pattern):
+        if part == "*":
+            params["splat"] = "/".join(parts[idx:])
+            break
+
+        if idx >= len(parts):
+            return None
+
+        if part.startswith(":"):
+            params[part[1:]] = parts[idx]
+        elif part != parts[idx]:
+            return None
+    else:
+        if len(parts) != len(pattern):
+            return None
+
+    target: str = redirect["to"]
+
+    for key, value in params.items():
+        target = target.replace(f":{key}", value)
+
+    return target
+
+
+def watched_files() -> List[str]:
+    return [
+        DEFAULT_CONFIG_FILE,
+        JOURNAL_FILE,
+        POSTS_INDEX_FILE,
+        "content/styles.css",
+        *(
+            font
+            for font in iglob("content/fonts/*.css")
+            if not font.endswith(".min.css")
+        ),
+    ]
+
+
+def serve(config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    """Serve the site from memory, re-rendering changed pages"""
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from mimetypes import guess_type
+    from threading import Lock
+    from time import sleep
+    from urllib.parse import unquote, urlsplit
+
+    redirects: List[Dict[str, Any]] = netlify_redirects()
+    render_lock: Lock = Lock()
+
+    def blog_hashes(config: Dict[str, Any]) -> Dict[str, str]:
+        fingerprint: str = build_fingerprint(config)
+        neighbours: Dict[str, List[Optional[str]]] = blog_neighbours(config)
+
+        return {
+            blog_id: blog_build_hash(
+                fingerprint, blog_id, blog_meta, neighbours[blog_id]
+            )
+            for blog_id, blog_meta in config["blogs"].items()
+        }
+
+    site: Dict[str, Any] = {
+        "config": config,
+        "hashes": blog_hashes(config),
+        "listings": listing_pages(config),
+        "pages": {},
+    }
+
+    def blog_url(blog_id: str) -> str:
+        return f"/{site['config']['blog-dir']}/{blog_id}"
+
+    def reload_config() -> None:
+        new_config: Dict[str, Any] = load_config()
+        new_hashes: Dict[str, str] = blog_hashes(new_config)
+        new_listings: Dict[str, Dict[str, Any]] = listing_pages(new_config)
+
+        with render_lock:
+            old_config: Dict[str, Any] = site["config"]
+            old_hashes: Dict[str, str] = site["hashes"]
+            old_listings: Dict[str, Dict[str, Any]] = site["listings"]
+            pages: Dict[str, Tuple[bytes, str]] = site["pages"]
+            invalidated: int = len(pages)
+
+            if {**old_config, "blogs": None} != {**new_config, "blogs": None}:
+                pages.clear()
+            else:
+                for blog_id in old_hashes.keys() | new_hashes.keys():
+                    if old_hashes.get(blog_id) != new_hashes.get(blog_id):
+                        pages.pop(blog_url(blog_id), None)
+
+                for path in old_listings.keys() | new_listings.keys():
+                    if old_listings.get(path) != new_listings.get(path):
+                        pages.pop(path, None)
+
+            invalidated -= len(pages)
+            site["config"], site["hashes"] = new_config, new_hashes
+            site["listings"] = new_listings
+
+        log(
+            f"Reloaded {DEFAULT_CONFIG_FILE!r}, invalidated {invalidated} page(s)",
+            "SERVE",
+        )
+
+    def watch() -> None:
+        mtimes: Dict[str, float] = {}
+
+        while True:
+            for file in watched_files():
+                mtime: float = os.path.getmtime(file) if os.path.isfile(file) else 0.0
+
+                if file in mtimes and mtimes[file] != mtime:
+                    log(f"{file!r} changed", "SERVE")
+
+                    if file.endswith(".css"):
+                        with render_lock:
+                            site["pages"].pop(f"/{file[:-4]}.min.css", None)
+                            font_faces.cache_clear()
+                    else:
+                        try:
+                            reload_config()
+                        except ValueError as err:
+                            log(f"Failed to reload {file!r}: {err}")
+
+                mtimes[file] = mtime
+
+            sleep(SERVE_POLL_INTERVAL)
+
+    def render_page(path: str) -> Optional[Tuple[bytes, str]]:
+        with render_lock:
+            if path in site["pages"]:
+                return site["pages"][path]
+
+            config: Dict[str, Any] = site["config"]
+            blog_id: str = path[len(config["blog-dir"]) + 2 :]
+            page: Optional[Tuple[bytes, str]] = None
+
+            if path in site["listings"]:
+                page = (
+                    render_listing(config, path, site["listings"][path]),
+                    "text/html",
+                )
+            elif path == blog_url(blog_id) and blog_id in config["blogs"]:
+                page = (
+                    render_blog(
+                        config,
+                        blog_id,
+                        config["blogs"][blog_id],
+                        neighbours=blog_neighbours(config)[blog_id],
+                    ),
+                    "text/html",
+                )
+            elif path.endswith(".min.css") and os.path.isfile(f"{path[1:-8]}.css"):
+                with open(f"{path[1:-8]}.css", "rb") as css:
+                    page = minify_css(css.read())[0], "text/css"
+
+            if page is not None:
+                log(f"Rendered {path!r}", "SERVE")
+                site["pages"][path] = page
+
+            return page
+
+    def static_file(path: str) -> Optional[Tuple[bytes, str]]:
+        file: str = os.path.normpath(path.lstrip("/") or ".")
+
+        if file.startswith("..") or os.path.isabs(file) or not os.path.isfile(file):
+            return None
+
+        with open(file, "rb") as content:
+            return content.read(), guess_type(file)[0] or "application/octet-stream"
+
+    class ServeHandler(BaseHTTPRequestHandler):
+        """Serves rendered pages and static files, applying the redirects
+        of the netlify config like netlify would"""
+
+        def do_GET(self) -> None:
+            self.respond(True)
+
+        def do_HEAD(self) -> None:
+            self.respond(False)
+
+        def respond(self, send_body: bool) -> None:
+            path: str = unquote(urlsplit(self.path).path)
+
+            if path.endswith("/index.html"):
+                path = path[: -len("index.html")]
+
+            if path != "/":
+                path = path.rstrip("/")
+
+            for redirect in redirects:
+                if redirect.get("force") and self.redirect(redirect, path, send_body):
+                    return
+
+            page: Optional[Tuple[bytes, str]] = render_page(path) or static_file(path)
+
+            if page is None:
+                for redirect in redirects:
+                    if not redirect.get("force") and self.redirect(
+                        redirect, path, send_body
+                    ):
+                        return
+
+                page = b"404: Not found", "text/plain"
+                self.send_response(404)
+            else:
+                self.send_response(200)
+
+            self.send_page(page, send_body)
+
+        def send_page(self, page: Tuple[bytes, str], send_body: bool) -> None:
+            self.send_header(
+                "Content-Type",
+                f"{page[1]}; charset=utf-8" if page[1].startswith("text/") else page[1],
+            )
+            self.send_header("Content-Length", str(len(page[0])))
+            self.end_headers()
+
+            if send_body:
+                self.wfile.write(page[0])
+
+        def redirect(
+            self, redirect: Dict[str, Any], path: str, send_body: bool
+        ) -> bool:
+            target: Optional[str] = match_redirect(redirect, path)
+
+            if target is None:
+                return False
+
+            status: int = redirect.get("status", 301)
+
+            if status == 404:
+                self.send_response(404)
+                self.send_page((f"404: {target}".encode(), "text/plain"), send_body)
+                return True
+
+            # Rewrites (200) to other sites can't be proxied locally
+            self.send_response(302 if status == 200 else status)
+            self.send_header("Location", target)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+            return True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            log(format % args, "SERVE")
+
+    try:
+        port: int = int(FLAGS.get("port") or DEFAULT_SERVE_PORT)
+    except ValueError:
+        return log(f"Invalid port {FLAGS['port']!r}"), config
+
+    Thread(target=watch, daemon=True).start()
+
+    server: ThreadingHTTPServer = ThreadingHTTPServer((SERVE_HOST, port), ServeHandler)
+    log(f"Serving on http://{SERVE_HOST}:{port}/", "SERVE")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log("Stopping", "SERVE")
+    finally:
+        server.server_close()
+
+    return EXIT_OK, site["config"]
+
+
 SUBCOMMANDS: Dict[str, Callable[[Dict[str, Any]], Tuple[int, Dict[str, Any]]]] = {
     "help": dummy,
     "new": new_blog,
@@ -880,82 +4105,122 @@ SUBCOMMANDS: Dict[str, Callable[[Dict[str, Any]], Tuple[int, Dict[str, Any]]]] =
     "metadata": generate_metadata,
     "static": generate_static_full,
     "css": build_css,
+    "fonts": subset_fonts,
+    "search": build_search,
+    "cache": cache,
+    "compress": compress,
+    "migrate": migrate,
+    "serve": serve,
+}
+
+
+COMPACTING_SUBCOMMANDS: Set[str] = {
+    "build",
+    "static",
+    "clean",
+    "metadata",
+    "compress",
 }
+INTERACTIVE_SUBCOMMANDS: Set[str] = {"new", "edit", "rm", "defcfg"}
 
 
 def usage(code: int = EXIT_ERR, _: Optional[Dict[str, Any]] = None) -> int:
-    sys.stderr.write(f"Usage: {sys.argv[0]} <subcommand>\n")
+    sys.stderr.write(f"Usage: {sys.argv[0]} <subcommand> [--flag[=value]...]\n")
 
     for subcommand, func in SUBCOMMANDS.items():
         sys.stderr.write(f"  {subcommand:20s}{func.__doc__ or ''}\n")
 
+    sys.stderr.write("\nFlags:\n")
+
+    for flag, description in FLAGS_HELP.items():
+        sys.stderr.write(f"  --{flag:18s}{description}\n")
+
     return code
 
 
-def main() -> int:
-    """Entry/main function"""
+def parse_flags(args: List[str]) -> int:
+    for arg in args:
+        if not arg.startswith("--"):
+            return log(f"{arg!r} is not a flag, try `{sys.argv[0]} help`")
+
+        flag, _, value = arg[2:].partition("=")
+
+        if flag not in FLAGS_HELP:
+            return log(f"{arg!r} is not a flag, try `{sys.argv[0]} help`")
+
+        FLAGS[flag] = value
+
+    return EXIT_OK
+
+
+def init_readline() -> None:
+    import readline
+    from atexit import register as fn_register
+
+    if not os.path.isfile(HISTORY_FILE):
+        open(HISTORY_FILE, "w").close()
 
-    if NOT_CI_BUILD:
-        if not os.path.isfile(HISTORY_FILE):
-            open(HISTORY_FILE, "w").close()
+    readline.parse_and_bind("tab: complete")
 
-        readline.parse_and_bind("tab: complete")
+    fn_register(readline.write_history_file, HISTORY_FILE)
+    fn_register(readline.read_history_file, HISTORY_FILE)
 
-        fn_register(readline.write_history_file, HISTORY_FILE)
-        fn_register(readline.read_history_file, HISTORY_FILE)
+    readline.read_history_file(HISTORY_FILE)
+    readline.set_history_length(5000)
 
-        readline.read_history_file(HISTORY_FILE)
-        readline.set_history_length(5000)
+    readline.set_auto_history(False)
 
-        readline.set_auto_history(False)
+
+def main() -> int:
+    """Entry/main function"""
 
     if not os.path.isfile(DEFAULT_CONFIG_FILE):
         new_config()
         log(f"PLease configure {DEFAULT_CONFIG_FILE!r}")
         return EXIT_ERR
 
-    if len(sys.argv) != 2:
+    if len(sys.argv) < 2:
         return usage()
     elif sys.argv[1] not in SUBCOMMANDS:
         return log(f"{sys.argv[1]!r} is not a subcommand, try `{sys.argv[0]} help`")
     elif sys.argv[1] == "help":
         return usage(EXIT_OK)
+    elif parse_flags(sys.argv[2:]) != EXIT_OK:
+        return EXIT_ERR
 
-    with open(DEFAULT_CONFIG_FILE, "r") as lcfg:
-        cmd_time_init = code_timer()
-
-        code: int
-        config: Dict[str, Any]
-
-        code, config = SUBCOMMANDS[sys.argv[1]](ujson.load(lcfg))
+    if NOT_CI_BUILD and sys.argv[1] in INTERACTIVE_SUBCOMMANDS:
+        init_readline()
 
-        log(
-            f"Finished in {code_timer() - cmd_time_init} seconds with code {code}",
-            "TIME",
-        )
+    config: Dict[str, Any] = load_config()
 
-        if config["blogs"] and NOT_CI_BUILD:
-            log("Sorting blogs by creation time...", "CLEANUP")
+    if sys.argv[1] in COMPACTING_SUBCOMMANDS and needs_compaction(config):
+        compact_config(config)
 
-            sort_timer = code_timer()
+    cmd_time_init = code_timer()
+    cmd_cpu_init: float = cpu_time()
 
-            config["blogs"] = dict(
-                map(
-                    lambda k: (k, config["blogs"][k]),
-                    sorted(config["blogs"], key=lambda k: config["blogs"][k]["time"]),
-                )
-            )
+    code: int
+    code, config = SUBCOMMANDS[sys.argv[1]](config)
 
-            log(f"Sorted in {code_timer() - sort_timer} seconds", "TIME")
+    log(
+        f"Finished in {code_timer() - cmd_time_init} seconds with code {code}\
+{render_cache_stats()}",
+        "TIME",
+    )
 
-        log("Redumping config", "CONFIG")
+    if "profile" in FLAGS:
+        profile_report(
+            sys.argv[1], code_timer() - cmd_time_init, cpu_time() - cmd_cpu_init
+        )
 
-        dump_timer = code_timer()
+    if FLAGS.get("profile-blog") and profile_blog(config, FLAGS["profile-blog"]):
+        code = EXIT_ERR
 
-        with open(DEFAULT_CONFIG_FILE, "w") as dcfg:
-            ujson.dump(config, dcfg, indent=(4 if NOT_CI_BUILD else 0))
+    if JOURNAL:
+        flush_journal(config)
 
-        log(f"Dumped config in {code_timer() - dump_timer} seconds", "TIME")
+    if OUTPUT_CHANGES["written"] or OUTPUT_CHANGES["removed"]:
+        dump_output_changes()
 
     return code
 